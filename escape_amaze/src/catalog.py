@@ -0,0 +1,236 @@
+"""Offline catalog of pre-solved escape_amaze mazes, sorted by difficulty.
+
+Build one on every core, then drop it next to the game as mazes.bin:
+
+    python catalog.py build mazes.bin --count 1000000 --levels 1-30
+    python catalog.py info mazes.bin
+
+File layout (little-endian):
+    header   magic, version, board size, record size, record count, bucket count
+    index    (first record, record count) for every bucket, bucket = optimal slides
+    records  fixed size: walls bitboard, coin count, up to 3 coins and the start as cell
+             indices, optimal slides, slides with one wall destroyed, rating
+
+Records are sorted by rating, so each bucket is one contiguous run and a maze
+of a given difficulty is one seek into the memory-mapped file.
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import random
+import struct
+import time
+
+from game_state import DIRECTIONS, WALL, maze_cells
+from solver import slide_stop, solve
+
+MAGIC = b"AMAZ"
+VERSION = 2
+HEADER = struct.Struct("<4sHHHQH")  # magic, version, size, record size, record count, bucket count
+BUCKET = struct.Struct("<QQ")  # first record, record count
+MAX_COINS = 3
+CHUNK = 2000  # Mazes per worker task
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mazes.bin")
+
+def record_struct(size):
+    # Walls bitboard, coin count, coins, start, optimal slides, slides with one destroy, rating.
+    # Every cell index up to 65535 is a real cell on a 256x256 board, so unused coin slots are
+    # told apart by the count rather than a sentinel index.
+    return struct.Struct(f"<{(size * size + 7) // 8}sB{MAX_COINS}HHBBH")
+
+def rate(maze_data):
+    """Optimal slides, slides when one wall may be destroyed first, and a rating.
+
+    Only walls that stop a slide from a reachable cell can change the solution, so
+    those are the only ones tried. A destroy that saves slides makes the maze easier:
+    the rating is 8 * optimal slides minus the slides saved (at most 7).
+    """
+    size = maze_data['size']
+    cells = maze_cells(maze_data)
+    moves = maze_data['moves']
+    start = maze_data['start'][1] * size + maze_data['start'][0]
+
+    # Every cell reachable by sliding, and the walls that stop those slides
+    reachable = {start}
+    frontier = [start]
+    stoppers = set()
+    while frontier:
+        index = frontier.pop()
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+            stop = slide_stop(cells, size, index, direction)
+            x, y = stop % size + dx, stop // size + dy
+            if 0 <= x < size and 0 <= y < size and cells[y * size + x] & WALL:
+                stoppers.add(y * size + x)
+            if stop not in reachable:
+                reachable.add(stop)
+                frontier.append(stop)
+
+    assisted = moves
+    for wall in stoppers:
+        cells[wall] &= ~WALL
+        path = solve(cells, size, maze_data['start'])
+        cells[wall] |= WALL
+        if path is not None and len(path) < assisted:
+            assisted = len(path)
+    return moves, assisted, 8 * moves - min(7, moves - assisted)
+
+def pack(maze_data, record):
+    size = maze_data['size']
+    walls = 0
+    for x, y in maze_data['walls']:
+        walls |= 1 << (y * size + x)
+    coins = [y * size + x for x, y in maze_data['coins'][:MAX_COINS]]
+    coin_count = len(coins)
+    coins += [0] * (MAX_COINS - coin_count)
+    start = maze_data['start'][1] * size + maze_data['start'][0]
+    moves, assisted, rating = rate(maze_data)
+    data = record.pack(walls.to_bytes((size * size + 7) // 8, "little"), coin_count, *coins, start,
+                       min(moves, 255), min(assisted, 255), rating)
+    return rating, data
+
+def build_chunk(task):
+    # Worker: generate, solve and rate one chunk; returns rating -> packed records
+    seed, count, size, low, high = task
+    from maze_generator import MazeGenerator
+
+    random.seed(seed)  # The generator draws from the global random module
+    generator = MazeGenerator(catalog_path=None)
+    record = record_struct(size)
+    by_rating = {}
+    for _ in range(count):
+        maze = generator.generate_maze(random.randint(low, high), size)
+        rating, data = pack(maze, record)
+        by_rating.setdefault(rating, []).append(data)
+    return {rating: b"".join(records) for rating, records in by_rating.items()}
+
+def build(path, count, size, low, high, seed, workers):
+    record = record_struct(size)
+    tasks = [(seed + number, min(CHUNK, count - start), size, low, high)
+             for number, start in enumerate(range(0, count, CHUNK))]
+
+    # Counting sort: records are bucketed by rating as chunks come back
+    by_rating = {}
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for done, chunk in enumerate(pool.imap_unordered(build_chunk, tasks), 1):
+            for rating, data in chunk.items():
+                by_rating.setdefault(rating, bytearray()).extend(data)
+            if done % 50 == 0 or done == len(tasks):
+                made = min(count, done * CHUNK)
+                print(f"{made} mazes, {made / (time.perf_counter() - started):.0f} per second")
+
+    # Index: bucket = optimal slides; ratings of one bucket are contiguous
+    bucket_count = (max(by_rating) + 7) // 8 + 1 if by_rating else 0
+    buckets = [[0, 0] for _ in range(bucket_count)]
+    position = 0
+    for rating in sorted(by_rating):
+        moves = (rating + 7) // 8
+        records = len(by_rating[rating]) // record.size
+        if buckets[moves][1] == 0:
+            buckets[moves][0] = position
+        buckets[moves][1] += records
+        position += records
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, size, record.size, position, bucket_count))
+        for first, records in buckets:
+            file.write(BUCKET.pack(first, records))
+        for rating in sorted(by_rating):
+            file.write(by_rating[rating])
+    print(f"Wrote {position} mazes to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+class MazeCatalog:
+    """A catalog file, memory-mapped; picking a maze reads one record."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, record_size, self.count, bucket_count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} maze catalog")
+        self.record = record_struct(self.size)
+        if self.record.size != record_size:
+            raise ValueError(f"{path} has {record_size} byte records, expected {self.record.size}")
+        self.buckets = [BUCKET.unpack_from(self.map, HEADER.size + number * BUCKET.size)
+                        for number in range(bucket_count)]
+        self.records_offset = HEADER.size + bucket_count * BUCKET.size
+        # Nearest bucket with mazes in it at or below each difficulty, so picks never search
+        self.nearest = []
+        last = None
+        for number, (first, records) in enumerate(self.buckets):
+            if records:
+                last = number
+            self.nearest.append(last)
+        self.first_bucket = next((number for number in self.nearest if number is not None), None)
+
+    def read(self, number):
+        """Maze data for record number."""
+        size = self.size
+        walls_bits, coin_count, *coins, start, moves, assisted, rating = self.record.unpack_from(
+            self.map, self.records_offset + number * self.record.size)
+        walls_bits = int.from_bytes(walls_bits, "little")
+        walls = []
+        while walls_bits:
+            low = walls_bits & -walls_bits
+            index = low.bit_length() - 1
+            walls.append([index % size, index // size])
+            walls_bits ^= low
+        return {
+            'walls': walls,
+            'coins': [[coin % size, coin // size] for coin in coins[:coin_count]],
+            'start': [start % size, start // size],
+            'size': size,
+            'moves': moves,
+            'assisted_moves': assisted,
+            'rating': rating,
+        }
+
+    def pick(self, moves, rng=random):
+        """A random maze whose optimal solution is moves slides, or the nearest easier one."""
+        if self.first_bucket is None:
+            raise ValueError("empty maze catalog")
+        bucket = self.nearest[min(max(moves, 0), len(self.nearest) - 1)]
+        if bucket is None:
+            bucket = self.first_bucket
+        first, records = self.buckets[bucket]
+        return self.read(first + rng.randrange(records))
+
+    def close(self):
+        self.map.close()
+
+    # An mmap can't be pickled; a copy sent to another process maps the file again
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect an escape_amaze maze catalog")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="generate, solve and rate mazes on every core")
+    build_parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    build_parser.add_argument("--count", type=int, default=100000)
+    build_parser.add_argument("--size", type=int, default=10)
+    build_parser.add_argument("--levels", default="1-30", help="range of levels to draw wall and coin counts from")
+    build_parser.add_argument("--seed", type=int, default=0)
+    build_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    info_parser = commands.add_parser("info", help="show bucket sizes")
+    info_parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        low, _, high = args.levels.partition("-")
+        build(args.path, args.count, args.size, int(low), int(high or low), args.seed, args.workers)
+    else:
+        catalog = MazeCatalog(args.path)
+        print(f"{catalog.count} mazes, {catalog.size}x{catalog.size}, {catalog.record.size} byte records")
+        for moves, (first, records) in enumerate(catalog.buckets):
+            if records:
+                print(f"  {moves:3d} slides: {records}")
+        catalog.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from array import array
 from enum import Enum
 
 class GameState(Enum):
@@ -6,6 +7,121 @@ class GameState(Enum):
     GAME_OVER = 2
     BLOCKCIDE = 3  # New state for voluntary reset
 
+# Cell flags for Game.cells
+WALL = 1
+BLOCK = 2  # Player-placed block
+COIN = 4
+VISITED = 8
+SOLID = WALL | BLOCK
+
+# Slide directions, indexed like the entries of a SlideTable
+UP, DOWN, LEFT, RIGHT = range(4)
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+def maze_cells(maze_data):
+    """Cell flags for the walls and coins of a generated maze."""
+    size = maze_data['size']
+    cells = bytearray(size * size)
+    for x, y in maze_data['walls']:
+        cells[y * size + x] |= WALL
+    for x, y in maze_data['coins']:
+        cells[y * size + x] |= COIN
+    return cells
+
+# Byte translation tables for a slide's crossed cells, taken as one slice of Game.cells
+CROSS = bytes((flags & ~COIN) | VISITED for flags in range(256))  # Coins taken, cell visited
+COIN_MARKS = bytes(1 if flags & COIN else 0 for flags in range(256))  # 1 where a coin is
+
+class SlideTable:
+    """Where a slide from every cell in every direction stops, and how many coins it collects.
+
+    Entries are indexed by cell index * 4 + direction and held in flat arrays, 20 bytes
+    per cell at any board size; a slide's coins count every cell it enters, stop
+    included. Placing or destroying a block, or collecting a coin, rebuilds the rows
+    and columns through those cells.
+    """
+
+    def __init__(self, cells, size):
+        self.cells = cells  # Shared with the Game, read when rows and columns are rebuilt
+        self.size = size
+        self.stops = array('i', [0]) * (size * size * 4)
+        self.coins = array('B', [0]) * (size * size * 4)  # A slide crosses at most 255 cells
+        for y in range(size):
+            self.build_row(y)
+        for x in range(size):
+            self.build_column(x)
+
+    def stop(self, index, direction):
+        return self.stops[index * 4 + direction]
+
+    def coins_collected(self, index, direction):
+        return self.coins[index * 4 + direction]
+
+    def update(self, x, y):
+        """Rebuild the entries a wall or block appearing or disappearing at (x, y) can change."""
+        self.build_row(y)
+        self.build_column(x)
+
+    def update_cells(self, indices):
+        """Rebuild every row and column through the given cells, each once."""
+        size = self.size
+        for y in {index // size for index in indices}:
+            self.build_row(y)
+        for x in {index % size for index in indices}:
+            self.build_column(x)
+
+    def build_row(self, y):
+        size, cells, stops, coins = self.size, self.cells, self.stops, self.coins
+        base = y * size
+        start = 0
+        while start < size:
+            if cells[base + start] & SOLID:
+                index = base + start
+                stops[index * 4 + LEFT] = stops[index * 4 + RIGHT] = index
+                coins[index * 4 + LEFT] = coins[index * 4 + RIGHT] = 0
+                start += 1
+                continue
+            # A run of open cells: every slide inside it stops at one of its ends
+            end = start
+            while end + 1 < size and not cells[base + end + 1] & SOLID:
+                end += 1
+            run_coins = cells[base + start:base + end + 1].translate(COIN_MARKS).count(1)
+            before = 0  # Coins in the run left of x
+            for x in range(start, end + 1):
+                index = base + x
+                here = COIN_MARKS[cells[index]]
+                stops[index * 4 + LEFT] = base + start
+                coins[index * 4 + LEFT] = before
+                stops[index * 4 + RIGHT] = base + end
+                coins[index * 4 + RIGHT] = run_coins - before - here
+                before += here
+            start = end + 1
+
+    def build_column(self, x):
+        size, cells, stops, coins = self.size, self.cells, self.stops, self.coins
+        start = 0
+        while start < size:
+            if cells[start * size + x] & SOLID:
+                index = start * size + x
+                stops[index * 4 + UP] = stops[index * 4 + DOWN] = index
+                coins[index * 4 + UP] = coins[index * 4 + DOWN] = 0
+                start += 1
+                continue
+            end = start
+            while end + 1 < size and not cells[(end + 1) * size + x] & SOLID:
+                end += 1
+            run_coins = cells[start * size + x:end * size + x + 1:size].translate(COIN_MARKS).count(1)
+            before = 0  # Coins in the run above y
+            for y in range(start, end + 1):
+                index = y * size + x
+                here = COIN_MARKS[cells[index]]
+                stops[index * 4 + UP] = start * size + x
+                coins[index * 4 + UP] = before
+                stops[index * 4 + DOWN] = end * size + x
+                coins[index * 4 + DOWN] = run_coins - before - here
+                before += here
+            start = end + 1
+
 class Player:
     def __init__(self):
         self.x = 0
@@ -28,6 +144,7 @@ class Cursor:
 
 class Game:
     def __init__(self):
+        self.version = 0  # Bumped on every change to the board or the HUD numbers
         self.reset_game()
 
     def reset_game(self):
@@ -40,26 +157,53 @@ class Game:
         self.blocks_destroyed = 0  # Counter for destroy cost
         self.player = Player()
         self.cursor = Cursor()
-        self.grid = [[False] * 10 for _ in range(10)]
-        self.walls = []
-        self.coin_positions = []
-        self.player_placed_blocks = []
         self.grid_size = 10
+        self.cells = bytearray(self.grid_size * self.grid_size)  # Flags per cell, row by row
+        self.slides = SlideTable(self.cells, self.grid_size)
+        self.version += 1
 
     def init_level(self, maze_data):
         """Initialize level with maze data."""
-        self.walls = maze_data['walls']
-        self.coin_positions = maze_data['coins']
+        size = maze_data['size']
+        self.grid_size = size
+        self.cells = maze_cells(maze_data)  # Placed blocks are reset for the new level
         self.player.x = maze_data['start'][0]
         self.player.y = maze_data['start'][1]
         self.cursor.x = maze_data['start'][0]
         self.cursor.y = maze_data['start'][1]
-        self.grid = [[False] * maze_data['size'] for _ in range(maze_data['size'])]
-        self.player_placed_blocks = []  # Reset placed blocks for new level
-        self.grid[self.player.y][self.player.x] = True
-        self.grid_size = maze_data['size']
+        self.cells[self.player.y * size + self.player.x] |= VISITED
+        self.slides = SlideTable(self.cells, size)
+        self.version += 1
         # Don't reset block counters - they persist until game restart
 
+    def cell(self, x, y):
+        """Get the flags of the cell at (x, y)."""
+        return self.cells[y * self.grid_size + x]
+
+    def positions_with(self, flag):
+        """List [x, y] of every cell with the given flag, row by row."""
+        size = self.grid_size
+        return [[index % size, index // size] for index, cell in enumerate(self.cells) if cell & flag]
+
+    # List views of the cell flags, for code that wants positions rather than cells
+    @property
+    def walls(self):
+        return self.positions_with(WALL)
+
+    @property
+    def coin_positions(self):
+        return self.positions_with(COIN)
+
+    @property
+    def player_placed_blocks(self):
+        return self.positions_with(BLOCK)
+
+    @property
+    def grid(self):
+        """Visited cells as rows of booleans."""
+        size = self.grid_size
+        return [[bool(cell & VISITED) for cell in self.cells[y * size:(y + 1) * size]] for y in range(size)]
+
     def get_next_block_cost(self):
         """Get the cost of placing the next block."""
         return self.blocks_placed + 1  # Cost increases by 1 for each block placed
@@ -71,36 +215,33 @@ class Game:
     def try_place_block(self):
         """Try to place a block at cursor position."""
         block_cost = self.get_next_block_cost()
-        pos = [self.cursor.x, self.cursor.y]
-        if (pos not in self.walls and
-            pos not in self.coin_positions and
-            pos != [self.player.x, self.player.y] and
-            pos not in self.player_placed_blocks and
+        index = self.cursor.y * self.grid_size + self.cursor.x
+        if (not self.cells[index] & (SOLID | COIN) and
+            (self.cursor.x, self.cursor.y) != (self.player.x, self.player.y) and
             self.coins >= block_cost):  # Only check if we have enough coins
-            self.player_placed_blocks.append(pos)
+            self.cells[index] |= BLOCK
+            self.slides.update(self.cursor.x, self.cursor.y)
             self.coins -= block_cost
             self.blocks_placed += 1  # Increment counter for next cost
+            self.version += 1
             return True
         return False
 
     def try_destroy_block(self):
         """Try to destroy a block or wall at cursor position, turning it into free space."""
         destroy_cost = self.get_next_destroy_cost()
-        pos = [self.cursor.x, self.cursor.y]
+        index = self.cursor.y * self.grid_size + self.cursor.x
         
         # Can destroy either placed blocks or walls
-        can_destroy = (pos in self.player_placed_blocks or pos in self.walls)
+        can_destroy = self.cells[index] & SOLID
         
         if (can_destroy and self.coins >= destroy_cost):
-            # Remove block/wall and make space free
-            if pos in self.player_placed_blocks:
-                self.player_placed_blocks.remove(pos)
-            if pos in self.walls:
-                self.walls.remove(pos)
+            # Remove block/wall and make space free, marked as passable
+            self.cells[index] = (self.cells[index] & ~SOLID) | VISITED
+            self.slides.update(self.cursor.x, self.cursor.y)
             self.coins -= destroy_cost
             self.blocks_destroyed += 1  # Increment counter for next cost
-            # Make sure the space is marked as passable
-            self.grid[pos[1]][pos[0]] = True
+            self.version += 1
             return True
         return False
 
@@ -110,28 +251,38 @@ class Game:
 
     def start_movement(self, dx, dy):
         """Start player movement in the given direction."""
-        current_x = self.player.x
-        current_y = self.player.y
+        size = self.grid_size
+        cells = self.cells
         
-        # Keep moving until hitting a wall, block, or boundary
-        while True:
-            new_x = current_x + dx
-            new_y = current_y + dy
-            
-            # Check if movement is valid
-            if (0 <= new_x < len(self.grid) and 0 <= new_y < len(self.grid) and
-                [new_x, new_y] not in self.walls and
-                [new_x, new_y] not in self.player_placed_blocks):
-                current_x = new_x
-                current_y = new_y
-                self.grid[current_y][current_x] = True
-                
-                # Collect any coins along the path
-                if [current_x, current_y] in self.coin_positions:
-                    self.coin_positions.remove([current_x, current_y])
-                    self.coins += 1
+        # The slide table knows where we stop when hitting a wall, block, or boundary,
+        # and how many coins we pick up on the way
+        start = self.player.y * size + self.player.x
+        direction = DIRECTIONS.index((dx, dy))
+        stop = self.slides.stop(start, direction)
+        if stop != start:
+            # The crossed cells are one slice of the grid (a stride of size for columns):
+            # visit them and take their coins with a single translate
+            step = abs(dy * size + dx)
+            if start < stop:
+                crossed = slice(start + step, stop + 1, step)
             else:
-                break
+                crossed = slice(stop, start, step)
+            collected = self.slides.coins_collected(start, direction)
+            if collected:
+                # Find the coins so the table can drop them from every slide through them
+                marks = cells[crossed].translate(COIN_MARKS)
+                taken = []
+                offset = marks.find(1)
+                while offset != -1:
+                    taken.append(crossed.start + offset * step)
+                    offset = marks.find(1, offset + 1)
+            cells[crossed] = cells[crossed].translate(CROSS)
+            if collected:
+                self.coins += collected
+                self.slides.update_cells(taken)
+            self.version += 1
+        current_x = stop % size
+        current_y = stop // size
         
         # Update final position
         if (current_x != self.player.x or current_y != self.player.y):
@@ -154,8 +305,7 @@ class Game:
 
     def check_game_over(self):
         """Check if player has lost."""
-        player_pos = [self.player.x, self.player.y]
-        if player_pos in self.walls or player_pos in self.player_placed_blocks:
+        if self.cell(self.player.x, self.player.y) & SOLID:
             self.state = GameState.GAME_OVER
 
     def check_level_complete(self):
@@ -165,6 +315,7 @@ class Game:
             self.state == GameState.PLAYING):
             self.levels_beaten = self.current_level - 1  # Update levels beaten
             self.current_level += 1  # Increment level
+            self.version += 1
             self.state = GameState.LEVEL_COMPLETE
             return True
         return False
\ No newline at end of file
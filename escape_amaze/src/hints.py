@@ -0,0 +1,262 @@
+"""Anytime hint engine for escape_amaze.
+
+A* over everything the player can do: slide, place a block, destroy a wall or
+block. A state is the ball's cell, the coins still on the board, the coins in
+hand, the place/destroy counters (which set the next costs) and the walls and
+blocks changed so far. Each action costs 1, so the plan found is the fewest
+actions to the goal.
+
+Placing or destroying only matters for the slides after it, and deferring it
+to just before the first slide it changes never costs more (coins only pile
+up). So the search only tries changes to the next slide: destroying the walls
+and blocks that stop it one after another, then optionally placing a block
+somewhere along it. A second block on one slide changes nothing, and a block
+short of a destroyed stopper makes that destroy pointless.
+
+States are keyed by Zobrist hashes in a transposition table. They are tuples of
+plain ints (changed cells are a bitmask), which the garbage collector stops
+tracking, so a table of a few hundred thousand states never causes a long
+collection pause. The search runs
+in a background thread with a time budget, yielding the GIL regularly so
+pyxel's frames keep their pace, and its best plan so far can be read at any
+time.
+"""
+import heapq
+import random
+import threading
+import time
+
+from game_state import DIRECTIONS, SOLID, COIN, SlideTable
+
+HINT_BUDGET = 2.0  # Seconds of search per hint
+YIELD_EVERY = 200  # Expansions between GIL releases
+
+# Actions in a plan
+SLIDE = "slide"
+PLACE = "place"
+DESTROY = "destroy"
+
+class Zobrist:
+    """Random 64-bit keys for every part of a search state, XORed together."""
+
+    def __init__(self, cells, seed=0):
+        rng = random.Random(seed)
+        self.position = [rng.getrandbits(64) for _ in range(cells)]
+        self.coin = [rng.getrandbits(64) for _ in range(cells)]
+        self.changed = [rng.getrandbits(64) for _ in range(cells)]  # Wall destroyed or block placed
+        self.rng = rng
+        self.counters = {}
+
+    def counter(self, kind, value):
+        # Keys for the place/destroy counters, made as the search reaches new values
+        if (kind, value) not in self.counters:
+            self.counters[kind, value] = self.rng.getrandbits(64)
+        return self.counters[kind, value]
+
+class HintSearch:
+    def __init__(self, cells, size, position, coins, blocks_placed, blocks_destroyed):
+        self.cells = bytes(cells)  # Snapshot, the game keeps changing its own
+        self.slides = SlideTable(self.cells, size)  # Slides on the board as it was, before any change
+        self.size = size
+        self.goal = size - 1  # Top-right corner
+        self.zobrist = Zobrist(size * size)
+        coin_mask = 0
+        for index, cell in enumerate(self.cells):
+            if cell & COIN:
+                coin_mask |= 1 << index
+
+        key = self.zobrist.position[position]
+        for index in range(size * size):
+            if coin_mask >> index & 1:
+                key ^= self.zobrist.coin[index]
+        key ^= self.zobrist.counter(PLACE, blocks_placed) ^ self.zobrist.counter(DESTROY, blocks_destroyed)
+        # (cell, coins on the board, coins in hand, blocks placed, blocks destroyed, changed cells, key);
+        # coins and changed cells are bitmasks
+        self.start = (position, coin_mask, coins, blocks_placed, blocks_destroyed, 0, key)
+
+        self.best_cost = {key: 0}  # Transposition table: cheapest known way to each state
+        self.came_from = {key: None}  # key -> (parent key, actions tuple)
+        self.queue = [(self.heuristic(position), 0, 0, 0, self.start)]
+        self.counter = 1  # Tie breaker, so states are never compared
+        self.best = (self.heuristic(position), 0, key)  # Closest state to the goal so far
+        self.solved = position == self.goal
+        self.expanded = 0
+
+    def heuristic(self, position):
+        # The last slide into the corner runs up its column or along its row
+        if position == self.goal:
+            return 0
+        x, y = position % self.size, position // self.size
+        return 1 if x == self.size - 1 or y == 0 else 2
+
+    def solid(self, index, changed):
+        # A changed cell is a destroyed wall/block or a placed block: the opposite of what it was
+        return bool(self.cells[index] & SOLID) != bool(changed >> index & 1)
+
+    def walk(self, position, direction, changed):
+        """Cells a slide enters, and the cell that stops it (None at the edge)."""
+        dx, dy = DIRECTIONS[direction]
+        size = self.size
+        if not changed:
+            # Nothing placed or destroyed yet: the table has the stop
+            stop = self.slides.stop(position, direction)
+            step = dy * size + dx
+            x, y = stop % size + dx, stop // size + dy
+            stopper = y * size + x if 0 <= x < size and 0 <= y < size else None
+            return list(range(position + step, stop + step, step)), stopper
+        x, y = position % size, position // size
+        path = []
+        while 0 <= x + dx < size and 0 <= y + dy < size:
+            index = (y + dy) * size + x + dx
+            if self.solid(index, changed):
+                return path, index
+            path.append(index)
+            x += dx
+            y += dy
+        return path, None
+
+    def run(self, deadline, cancelled):
+        """Expand states until solved, out of states, past the deadline or cancelled."""
+        while self.queue and not self.solved:
+            if self.expanded % YIELD_EVERY == 0:
+                if time.perf_counter() > deadline or cancelled.is_set():
+                    return
+                time.sleep(0)  # Let the game thread run
+            self.expand(heapq.heappop(self.queue))
+
+    def expand(self, entry):
+        cost, state = entry[3], entry[4]
+        position, coin_mask, coins, placed, destroyed, changed, key = state
+        if self.best_cost.get(key, cost) < cost:
+            return  # Reached more cheaply since it was queued
+        if position == self.goal:
+            # Every action costs 1 and the heuristic never overestimates, so the first
+            # goal state out of the queue is a cheapest one
+            self.best = (0, cost, key)
+            self.solved = True
+            return
+        self.expanded += 1
+        zobrist = self.zobrist
+
+        for direction in range(4):
+            # Destroy none, one or several of the walls and blocks stopping the slide in turn,
+            # each time trying the slide as it is and with a block placed along it
+            now_changed, now_destroyed, now_coins, now_key = changed, destroyed, coins, key
+            changes = ()
+            path, stopper = self.walk(position, direction, changed)
+            while True:
+                self.push(state, cost + len(changes) + 1, path, now_changed, now_coins, placed, now_destroyed,
+                          now_key, changes + ((SLIDE, direction),))
+
+                # Place a block along the slide so it stops short; not on coins still on the board
+                if now_coins >= placed + 1:
+                    for stop in range(1, len(path)):
+                        block = path[stop]
+                        if coin_mask >> block & 1:
+                            continue
+                        self.push(state, cost + len(changes) + 2, path[:stop], now_changed ^ 1 << block,
+                                  now_coins - (placed + 1), placed + 1, now_destroyed,
+                                  now_key ^ zobrist.changed[block] ^ zobrist.counter(PLACE, placed)
+                                  ^ zobrist.counter(PLACE, placed + 1),
+                                  changes + ((PLACE, block), (SLIDE, direction)))
+
+                # Destroy whatever stops the slide, then slide further
+                if stopper is None or now_coins < now_destroyed + 1:
+                    break
+                now_coins -= now_destroyed + 1
+                now_key ^= (zobrist.changed[stopper] ^ zobrist.counter(DESTROY, now_destroyed)
+                            ^ zobrist.counter(DESTROY, now_destroyed + 1))
+                now_destroyed += 1
+                now_changed ^= 1 << stopper
+                changes += ((DESTROY, stopper),)
+                path, stopper = self.walk(position, direction, now_changed)
+
+    def push(self, parent, cost, path, changed, coins, placed, destroyed, key, actions):
+        if not path:
+            return
+        position, coin_mask = parent[0], parent[1]
+        stop = path[-1]
+        key ^= self.zobrist.position[position] ^ self.zobrist.position[stop]
+        for index in path:  # Coins collected on the way
+            if coin_mask >> index & 1:
+                coin_mask ^= 1 << index
+                coins += 1
+                key ^= self.zobrist.coin[index]
+
+        if self.best_cost.get(key, cost + 1) <= cost:
+            return
+        self.best_cost[key] = cost
+        self.came_from[key] = (parent[6], actions)
+        heuristic = self.heuristic(stop)
+        if (heuristic, cost) < self.best[:2] and not self.solved:
+            self.best = (heuristic, cost, key)
+        state = (stop, coin_mask, coins, placed, destroyed, changed, key)
+        heapq.heappush(self.queue, (cost + heuristic, -cost, self.counter, cost, state))
+        self.counter += 1
+
+    def plan(self):
+        """Actions to the goal, or towards the closest state found so far."""
+        actions = []
+        key = self.best[2]
+        while self.came_from[key] is not None:
+            key, step = self.came_from[key]
+            actions[:0] = step
+        return actions
+
+class HintEngine:
+    """Runs a HintSearch for the current game state in a background thread."""
+
+    def __init__(self, budget=HINT_BUDGET):
+        self.budget = budget
+        self.search = None
+        self.thread = None
+        self.cancelled = threading.Event()
+        self.game_key = None
+
+    def state_key(self, game):
+        # Everything a hint depends on; any move, place or destroy changes it
+        return (game.current_level, game.player.x, game.player.y, game.coins,
+                game.blocks_placed, game.blocks_destroyed)
+
+    def start(self, game):
+        """Start searching from the game's current state, dropping any earlier search."""
+        self.cancel()
+        self.cancelled = threading.Event()
+        self.game_key = self.state_key(game)
+        self.search = None
+        start = (bytes(game.cells), game.grid_size, game.player.y * game.grid_size + game.player.x,
+                 game.coins, game.blocks_placed, game.blocks_destroyed)
+        deadline = time.perf_counter() + self.budget
+        self.thread = threading.Thread(target=self.run, args=(start, deadline, self.cancelled), daemon=True)
+        self.thread.start()
+
+    def run(self, start, deadline, cancelled):
+        # Setting up a search hashes every cell, so on big boards it happens here too
+        search = HintSearch(*start)
+        if not cancelled.is_set():
+            self.search = search
+            search.run(deadline, cancelled)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.search = None
+        self.game_key = None
+
+    def matches(self, game):
+        return self.game_key is not None and self.game_key == self.state_key(game)
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def solved(self):
+        return self.search is not None and self.search.solved
+
+    def exhausted(self):
+        """Whether the search tried every reachable state without escaping."""
+        return self.search is not None and not self.search.queue and not self.search.solved
+
+    def plan(self):
+        """Best plan so far; safe to call while the search is still running."""
+        if self.search is None:
+            return []
+        return self.search.plan()
@@ -1,15 +1,26 @@
 import pyxel
-from maze_generator import MazeGenerator
-from game_state import Game, GameState, Player
+from maze_generator import MazeGenerator, MazePool
+from game_state import Game, GameState, Player, WALL, BLOCK, COIN, VISITED, SOLID, DIRECTIONS
+from hints import HintEngine, SLIDE, PLACE
 
 class MazeGame:
 
     first_time = True
+    DITHER_BANK = 2  # Image bank holding the menu overlay pattern
+    DITHER_TILE = 256  # Even, so tiles line up into one checkerboard
+    DITHER_KEY = 1  # Transparent color in the pattern
+    BOARD_BANK = 1  # Image bank holding the rendered board
+    HUD_BANK = 0  # Image bank holding the HUD text, drawn over the player and cursor
+    HUD_STRIP = 48  # Height of the HUD text strips at the top and bottom of the window
+    MIN_CELL_SIZE = 12  # Smallest cell drawn; boards that would need smaller cells scroll instead
     def __init__(self):
         # Initialize game window
         self.CELL_SIZE = 60  # Increased cell size for 600x600 window
-        self.GRID_SIZE = 10
+        self.GRID_SIZE = 10  # Cells across the window at full cell size; bigger boards shrink cells, then scroll
         window_size = self.CELL_SIZE * self.GRID_SIZE
+        self.cell_size = self.CELL_SIZE  # Cell size for the current board
+        self.camera_x = 0  # Board cell shown in the top-left corner
+        self.camera_y = 0
         pyxel.init(window_size, window_size, title="AI Maze Escape")
         
         # Colors
@@ -23,11 +34,22 @@ class MazeGame:
             'text': 7,      # White
             'placed_block': 13,  # Purple for player-placed blocks
             'cursor': 14,   # Pink for cursor highlight
-            'highlight': 6  # Light blue for highlighting
+            'highlight': 6,  # Light blue for highlighting
+            'hint': 8       # Red for the hint marker
         }
+
+        # Pre-render the checkerboard used to dim the screen behind menus
+        self.init_dither_overlay()
+        
+        # Window-sized banks for the board and HUD layers; banks are 256x256 by default
+        pyxel.images[self.BOARD_BANK] = pyxel.Image(window_size, window_size)
+        pyxel.images[self.HUD_BANK] = pyxel.Image(window_size, window_size)
+        self.layers_key = None  # (game, version, camera) the layers were drawn for
         
         # Initialize game components
         self.maze_generator = MazeGenerator()
+        self.maze_pool = MazePool(self.maze_generator)  # Upcoming levels generate in the background
+        self.hints = HintEngine()  # Searches in the background while the game keeps running
         self.game = Game()
         
         # Menu states and text
@@ -50,8 +72,22 @@ class MazeGame:
     
     def init_level(self):
         """Initialize a new level."""
-        maze_data = self.maze_generator.generate_maze(self.game.current_level)
+        maze_data = self.maze_pool.get(self.game.current_level, None)  # Boards grow with the level
+        self.hints.cancel()  # A hint is for the old maze, even if the new one starts the same way
         self.game.init_level(maze_data)
+        self.cell_size = max(self.MIN_CELL_SIZE, pyxel.width // self.game.grid_size)
+        self.camera_x = self.camera_y = 0
+        self.follow(self.game.player.x, self.game.player.y)
+    
+    def follow(self, x, y):
+        """Scroll the camera just enough to keep cell (x, y) a quarter view from the edges."""
+        view = pyxel.width // self.cell_size
+        margin = view // 4
+        limit = max(0, self.game.grid_size - view)  # Camera position showing the far edge
+        self.camera_x = min(max(self.camera_x, x + margin - view + 1), x - margin)
+        self.camera_y = min(max(self.camera_y, y + margin - view + 1), y - margin)
+        self.camera_x = min(max(self.camera_x, 0), limit)
+        self.camera_y = min(max(self.camera_y, 0), limit)
     
     def update(self):
         """Update game state."""
@@ -63,6 +99,7 @@ class MazeGame:
             
             if pyxel.btnp(pyxel.KEY_RETURN):
                 if self.menu_cursor_pos == 1:  
+                    self.maze_pool.shutdown()
                     pyxel.quit()
                 else:  
                     #self.menu_state = None  # Just clear the menu state, nothing else
@@ -78,7 +115,13 @@ class MazeGame:
                self.menu_cursor_pos = 0
                return
             
+            # A hint is for the position it was asked in
+            if self.hints.game_key is not None and not self.hints.matches(self.game):
+                self.hints.cancel()
+            
             # Handle input
+            player_before = (self.game.player.x, self.game.player.y)
+            cursor_before = (self.game.cursor.x, self.game.cursor.y)
             if not self.game.player.moving:
                 if pyxel.btnp(pyxel.KEY_UP):
                     self.game.start_movement(0, -1)
@@ -93,16 +136,18 @@ class MazeGame:
                 elif pyxel.btnp(pyxel.KEY_R):  
                     self.menu_state = 'pause'
                     self.menu_cursor_pos = 0
+                elif pyxel.btnp(pyxel.KEY_H):
+                    self.hints.start(self.game)
             
             # Update cursor position with WASD
             if pyxel.btnp(pyxel.KEY_W):
-                self.game.cursor.move(0, -1, self.GRID_SIZE)
+                self.game.cursor.move(0, -1, self.game.grid_size)
             elif pyxel.btnp(pyxel.KEY_S):
-                self.game.cursor.move(0, 1, self.GRID_SIZE)
+                self.game.cursor.move(0, 1, self.game.grid_size)
             elif pyxel.btnp(pyxel.KEY_A):
-                self.game.cursor.move(-1, 0, self.GRID_SIZE)
+                self.game.cursor.move(-1, 0, self.game.grid_size)
             elif pyxel.btnp(pyxel.KEY_D):
-                self.game.cursor.move(1, 0, self.GRID_SIZE)
+                self.game.cursor.move(1, 0, self.game.grid_size)
             
             # Place block with F key at cursor position
             if pyxel.btnp(pyxel.KEY_F):
@@ -115,6 +160,12 @@ class MazeGame:
             # Update player movement
             self.game.update_player_movement()
             
+            # Keep whatever just moved on screen
+            if (self.game.player.x, self.game.player.y) != player_before:
+                self.follow(self.game.player.x, self.game.player.y)
+            elif (self.game.cursor.x, self.game.cursor.y) != cursor_before:
+                self.follow(self.game.cursor.x, self.game.cursor.y)
+            
             # Check win/lose conditions
             #if self.game.levels_beaten == 10:
              #   self.game.check_game_over()
@@ -139,28 +190,10 @@ class MazeGame:
     
     def draw(self):
         """Draw the game."""
-        pyxel.cls(self.COLORS['bg'])
-        
-        # Draw grid and visited cells
-        for y in range(self.GRID_SIZE):
-            for x in range(self.GRID_SIZE):
-                if self.game.grid[y][x]:
-                    self.draw_cell(x, y, self.COLORS['path'])
-        
-        # Draw walls
-        for wall in self.game.walls:
-            self.draw_cell(wall[0], wall[1], self.COLORS['wall'])
-        
-        # Draw player-placed blocks
-        for block in self.game.player_placed_blocks:
-            self.draw_cell(block[0], block[1], self.COLORS['placed_block'])
-        
-        # Draw coins
-        for coin in self.game.coin_positions:
-            self.draw_coin(coin[0], coin[1])
-        
-        # Draw goal (top-right corner)
-        self.draw_cell(self.GRID_SIZE - 1, 0, self.COLORS['exit'])
+        # Board and HUD come from cached layers, redrawn only when the game changes or the camera moves
+        if self.layers_key != (self.game, self.game.version, self.camera_x, self.camera_y):
+            self.draw_layers()
+        pyxel.blt(0, 0, self.BOARD_BANK, 0, 0, pyxel.width, pyxel.height)
         
         # Draw player
         self.draw_player(self.game.player.x, self.game.player.y)
@@ -168,36 +201,24 @@ class MazeGame:
         # Draw cursor with highlight effect
         cursor_x = self.game.cursor.x
         cursor_y = self.game.cursor.y
-        pos = [cursor_x, cursor_y]
         
         # Draw lighter version of whatever is under the cursor
-        if pos in self.game.walls or pos in self.game.player_placed_blocks:
+        if self.game.cell(cursor_x, cursor_y) & SOLID:
             color = self.COLORS['highlight']  
-        elif pos == [self.GRID_SIZE - 1, 0]:  
+        elif (cursor_x, cursor_y) == (self.game.grid_size - 1, 0):  
             color = self.COLORS['highlight']  
         else:
             color = self.COLORS['cursor']  
             
         self.draw_cell(cursor_x, cursor_y, color)
         
-        # Draw UI
-        self.draw_ui()
+        # Draw the next step of the hint, if one was asked for
+        if self.game.state == GameState.PLAYING:
+            self.draw_hint()
         
-        # Draw coins and costs
-        pyxel.text(4, 4, f"Coins: {self.game.coins}", self.COLORS['text'])
-        next_place_cost = self.game.get_next_block_cost()
-        next_destroy_cost = self.game.get_next_destroy_cost()
-        pyxel.text(4, 12, f"Place Cost: {next_place_cost}", self.COLORS['text'])
-        pyxel.text(4, 20, f"Destroy Cost: {next_destroy_cost}", self.COLORS['text'])
-        pyxel.text(4, 28, f"Level: {self.game.current_level}", self.COLORS['text'])
-        pyxel.text(4, 36, f"Levels Beaten: {self.game.levels_beaten}", self.COLORS['text'])
-        
-        # Draw instructions
-        pyxel.text(4, pyxel.height - 40, "Arrow keys to move", self.COLORS['text'])
-        pyxel.text(4, pyxel.height - 32, "WASD to move cursor", self.COLORS['text'])
-        pyxel.text(4, pyxel.height - 24, "F to place block", self.COLORS['text'])
-        pyxel.text(4, pyxel.height - 16, "E to remove wall/block", self.COLORS['text'])
-        pyxel.text(4, pyxel.height - 8, "C to forfeit game", self.COLORS['text'])
+        # HUD text stays on top of the player and cursor; it all sits in a strip at the top and one at the bottom
+        for y in (0, pyxel.height - self.HUD_STRIP):
+            pyxel.blt(0, y, self.HUD_BANK, 0, y, pyxel.width, self.HUD_STRIP, self.COLORS['bg'])
         
         # Draw game over screen
         if self.game.state == GameState.GAME_OVER:
@@ -219,10 +240,7 @@ class MazeGame:
         # Draw menu overlays if active
         if self.menu_state == 'pause':
             # Draw semi-transparent overlay
-            for y in range(pyxel.height):
-                for x in range(pyxel.width):
-                    if (x + y) % 2 == 0:  
-                        pyxel.pset(x, y, self.COLORS['bg'])
+            self.draw_dither_overlay()
             
             # Draw instructions
             y_pos = 50
@@ -236,10 +254,7 @@ class MazeGame:
             
         elif self.menu_state == 'victory':
             # Draw semi-transparent overlay
-            for y in range(pyxel.height):
-                for x in range(pyxel.width):
-                    if (x + y) % 2 == 0:
-                        pyxel.pset(x, y, self.COLORS['bg'])
+            self.draw_dither_overlay()
             
             # Draw victory message
             self.draw_centered_text("You win!", pyxel.height // 3)
@@ -248,34 +263,143 @@ class MazeGame:
             self.draw_menu_button("Continue to Unlimited", pyxel.width // 4, pyxel.height - 50, self.menu_cursor_pos == 0)
             self.draw_menu_button("Main Menu", 3 * pyxel.width // 4, pyxel.height - 50, self.menu_cursor_pos == 1)
     
-    def draw_cell(self, x, y, color):
-        """Draw a single cell."""
-        pyxel.rect(
-            x * self.CELL_SIZE,
-            y * self.CELL_SIZE,
-            self.CELL_SIZE - 1,
-            self.CELL_SIZE - 1,
+    def draw_layers(self):
+        """Render the board and the HUD into their image banks."""
+        board = pyxel.images[self.BOARD_BANK]
+        board.cls(self.COLORS['bg'])
+        
+        # Draw visited cells, walls, player-placed blocks and coins in one pass over the cells on screen
+        size = self.game.grid_size
+        view = pyxel.width // self.cell_size + 1  # The last column and row may show in part
+        left, right = self.camera_x, min(size, self.camera_x + view)
+        for y in range(self.camera_y, min(size, self.camera_y + view)):
+            row = y * size
+            for x, cell in enumerate(self.game.cells[row + left:row + right], left):
+                if not cell:
+                    continue
+                if cell & WALL:
+                    self.draw_cell(x, y, self.COLORS['wall'], board)
+                elif cell & BLOCK:
+                    self.draw_cell(x, y, self.COLORS['placed_block'], board)
+                elif cell & VISITED:
+                    self.draw_cell(x, y, self.COLORS['path'], board)
+                if cell & COIN:
+                    self.draw_coin(x, y, board)
+        
+        # Draw goal (top-right corner)
+        self.draw_cell(size - 1, 0, self.COLORS['exit'], board)
+        
+        # Draw UI on a clear layer; the background color is transparent
+        hud = pyxel.images[self.HUD_BANK]
+        hud.cls(self.COLORS['bg'])
+        self.draw_ui(hud)
+        
+        # Draw coins and costs
+        hud.text(4, 4, f"Coins: {self.game.coins}", self.COLORS['text'])
+        next_place_cost = self.game.get_next_block_cost()
+        next_destroy_cost = self.game.get_next_destroy_cost()
+        hud.text(4, 12, f"Place Cost: {next_place_cost}", self.COLORS['text'])
+        hud.text(4, 20, f"Destroy Cost: {next_destroy_cost}", self.COLORS['text'])
+        hud.text(4, 28, f"Level: {self.game.current_level}", self.COLORS['text'])
+        hud.text(4, 36, f"Levels Beaten: {self.game.levels_beaten}", self.COLORS['text'])
+        
+        # Draw instructions
+        hud.text(4, pyxel.height - 48, "H for a hint", self.COLORS['text'])
+        hud.text(4, pyxel.height - 40, "Arrow keys to move", self.COLORS['text'])
+        hud.text(4, pyxel.height - 32, "WASD to move cursor", self.COLORS['text'])
+        hud.text(4, pyxel.height - 24, "F to place block", self.COLORS['text'])
+        hud.text(4, pyxel.height - 16, "E to remove wall/block", self.COLORS['text'])
+        hud.text(4, pyxel.height - 8, "C to forfeit game", self.COLORS['text'])
+        
+        self.layers_key = (self.game, self.game.version, self.camera_x, self.camera_y)
+    
+    def init_dither_overlay(self):
+        """Fill an image bank with a checkerboard of background and transparent pixels."""
+        size = self.DITHER_TILE
+        even_row = f"{self.COLORS['bg']:x}{self.DITHER_KEY:x}" * (size // 2)
+        odd_row = f"{self.DITHER_KEY:x}{self.COLORS['bg']:x}" * (size // 2)
+        pyxel.images[self.DITHER_BANK].set(0, 0, [even_row if y % 2 == 0 else odd_row for y in range(size)])
+
+    def draw_dither_overlay(self):
+        """Dim the whole screen with the pre-rendered checkerboard, one blt per tile."""
+        size = self.DITHER_TILE
+        for y in range(0, pyxel.height, size):
+            for x in range(0, pyxel.width, size):
+                pyxel.blt(x, y, self.DITHER_BANK, 0, 0, size, size, self.DITHER_KEY)
+
+    def screen_position(self, x, y):
+        """Top-left pixel of board cell (x, y) on screen."""
+        return (x - self.camera_x) * self.cell_size, (y - self.camera_y) * self.cell_size
+
+    def draw_cell(self, x, y, color, image=pyxel):
+        """Draw a single cell, on the screen unless another image is given."""
+        left, top = self.screen_position(x, y)
+        image.rect(
+            left,
+            top,
+            self.cell_size - 1,
+            self.cell_size - 1,
             color
         )
     
-    def draw_coin(self, x, y):
+    def draw_coin(self, x, y, image=pyxel):
         """Draw a coin."""
-        center_x = x * self.CELL_SIZE + self.CELL_SIZE // 2
-        center_y = y * self.CELL_SIZE + self.CELL_SIZE // 2
-        radius = self.CELL_SIZE // 4
-        pyxel.circ(center_x, center_y, radius, self.COLORS['coin'])
+        left, top = self.screen_position(x, y)
+        center_x = left + self.cell_size // 2
+        center_y = top + self.cell_size // 2
+        radius = self.cell_size // 4
+        image.circ(center_x, center_y, radius, self.COLORS['coin'])
     
     def draw_player(self, x, y):
         """Draw the player."""
-        center_x = x * self.CELL_SIZE + self.CELL_SIZE // 2
-        center_y = y * self.CELL_SIZE + self.CELL_SIZE // 2
-        radius = self.CELL_SIZE // 3
+        left, top = self.screen_position(x, y)
+        center_x = left + self.cell_size // 2
+        center_y = top + self.cell_size // 2
+        radius = self.cell_size // 3
         pyxel.circ(center_x, center_y, radius, self.COLORS['player'])
     
-    def draw_ui(self):
+    def draw_hint(self):
+        """Mark the first action of the hint plan and say how far the plan goes."""
+        if not self.hints.matches(self.game):
+            return
+        plan = self.hints.plan()
+        if not plan:
+            if self.hints.running():
+                text = "Hint: thinking..."
+            elif self.hints.exhausted():
+                text = "Hint: no way out, press C"
+            else:
+                text = "Hint: nothing found in time"
+            pyxel.text(4, 44, text, self.COLORS['hint'])
+            return
+        
+        kind, target = plan[0]
+        if kind == SLIDE:
+            dx, dy = DIRECTIONS[target]
+            left, top = self.screen_position(self.game.player.x, self.game.player.y)
+            center_x = left + self.cell_size // 2
+            center_y = top + self.cell_size // 2
+            pyxel.line(center_x, center_y, center_x + dx * self.cell_size, center_y + dy * self.cell_size,
+                       self.COLORS['hint'])
+            text = f"Hint: slide {['up', 'down', 'left', 'right'][target]}"
+        else:
+            size = self.game.grid_size
+            left, top = self.screen_position(target % size, target // size)
+            pyxel.rectb(left, top, self.cell_size - 1, self.cell_size - 1, self.COLORS['hint'])
+            text = "Hint: place a block here" if kind == PLACE else "Hint: destroy this"
+        
+        if self.hints.solved():
+            text += f" ({len(plan)} steps to escape)"
+        elif self.hints.running():
+            text += " (still thinking)"
+        else:
+            text += " (best guess)"
+        pyxel.text(4, 44, text, self.COLORS['hint'])
+    
+    def draw_ui(self, image=pyxel):
         """Draw game UI."""
         # Score and level
-        pyxel.text(4, 20, f"Level: {self.game.current_level}", 7)
+        image.text(4, 20, f"Level: {self.game.current_level}", 7)
     
     def draw_centered_text(self, text, y):
         """Draw text centered on screen."""
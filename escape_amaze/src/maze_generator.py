@@ -1,18 +1,85 @@
+import os
 import random
+import time
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from solver import solve_maze
+from catalog import MazeCatalog, DEFAULT_PATH as CATALOG_PATH
+
+GENERATION_BUDGET = 0.05  # Seconds spent sampling for a solvable maze before repairing one
+MAX_WALL_DENSITY = 0.35  # Share of a board's free cells that can be walls
+MIN_BOARD_SIZE = 10
+MAX_BOARD_SIZE = 256
 
 class MazeGenerator:
-    def __init__(self):
-        """Initialize the maze generator."""
-        pass
+    def __init__(self, catalog_path=CATALOG_PATH):
+        """Initialize the maze generator, picking from a pre-built catalog when there is one."""
+        self.free_cell_index = {}  # Board size -> cells a wall may go on
+        self.catalog = None
+        if catalog_path and os.path.exists(catalog_path):
+            self.catalog = MazeCatalog(catalog_path)
+
+    def target_moves(self, level):
+        """Optimal number of slides for a catalog maze at this level."""
+        return 2 + level // 2
+
+    def free_cells(self, size):
+        """Every cell except the start, the goal and the cells next to the goal."""
+        if size not in self.free_cell_index:
+            reserved = [[0, size - 1], [size - 1, 0], [size - 2, 0], [size - 1, 1]]
+            self.free_cell_index[size] = [(x, y) for y in range(size) for x in range(size)
+                                          if [x, y] not in reserved]
+        return self.free_cell_index[size]
+
+    def wall_count(self, level, size):
+        """Walls for a level, clamped to what the board can hold."""
+        return min(10 + (level * 2), int(len(self.free_cells(size)) * MAX_WALL_DENSITY))
+
+    def board_size(self, level):
+        """Smallest board that fits the level's walls without clamping them."""
+        walls = 10 + (level * 2)
+        size = MIN_BOARD_SIZE
+        while size < MAX_BOARD_SIZE and walls > (size * size - 4) * MAX_WALL_DENSITY:
+            size += 1
+        return size
 
     def generate_maze(self, level, size=10):
-        """Generate a maze with walls, coins, and start/exit positions."""
+        """Generate a maze with walls, coins, and start/exit positions.
+
+        Pass size=None to grow the board with the level instead of clamping walls.
+        """
+        if size is None:
+            size = self.board_size(level)
+        if self.catalog is not None and self.catalog.size == size:
+            return self.catalog.pick(self.target_moves(level))
+
         # Scale difficulty with level
         min_coins = min(3, level)  # Cap coins at 3 per level
-        min_walls = 10 + (level * 2)  # More walls per level
+        min_walls = self.wall_count(level, size)  # More walls per level
         
-        return self.generate_fallback_maze(level, size)
+        # Sample until a maze can be escaped by sliding alone
+        deadline = time.perf_counter() + GENERATION_BUDGET
+        while True:
+            maze = self.generate_fallback_maze(level, size)
+            if self._validate_maze(maze, min_coins, min_walls):
+                moves = solve_maze(maze)
+                if moves is not None:
+                    maze['moves'] = len(moves)  # Optimal number of slides
+                    return maze
+            if time.perf_counter() > deadline:
+                return self.make_solvable(maze)
+
+    def make_solvable(self, maze_data):
+        """Remove random walls until the goal can be reached.
+
+        Removes an eighth of the remaining walls between solver runs, so it takes
+        O(log walls) solves; with every wall gone the goal is two slides away.
+        """
+        random.shuffle(maze_data['walls'])
+        while (moves := solve_maze(maze_data)) is None:
+            del maze_data['walls'][-max(1, len(maze_data['walls']) // 8):]
+        maze_data['moves'] = len(moves)
+        return maze_data
         
     def _validate_maze(self, maze_data, min_coins, min_walls):
         """Validate maze data meets requirements."""
@@ -23,7 +90,7 @@ class MazeGenerator:
         if not all(key in maze_data for key in required_keys):
             return False
             
-        size = 10  # Default size
+        size = maze_data.get('size', 10)
         
         # Check start position is valid
         start = maze_data['start']
@@ -64,37 +131,54 @@ class MazeGenerator:
             'size': size
         }
         
-        # Add walls (avoiding start, goal, and adjacent to goal)
-        num_walls = 10 + (level * 2)
-        goal_pos = [size - 1, 0]
-        goal_adjacent = [
-            [size - 2, 0],  # Left of goal
-            [size - 1, 1]   # Below goal
-        ]
-        
-        while len(maze['walls']) < num_walls:
-            x = random.randint(0, size-1)
-            y = random.randint(0, size-1)
-            pos = [x, y]
-            
-            # Don't place walls at start, goal, or adjacent to goal
-            if (pos != maze['start'] and 
-                pos != goal_pos and 
-                pos not in goal_adjacent and
-                pos not in maze['walls']):
-                maze['walls'].append(pos)
-        
-        # Add coins (avoiding walls and other coins)
+        # Add walls and coins by sampling without replacement from the cells they may go on
+        # (walls avoid start, goal, and adjacent to goal); bounded even on a full board
+        num_walls = self.wall_count(level, size)
         num_coins = min(3, level)  # Cap coins at 3 per level
-        while len(maze['coins']) < num_coins:
-            x = random.randint(0, size-1)
-            y = random.randint(0, size-1)
-            pos = [x, y]
-            
-            if (pos not in maze['walls'] and 
-                pos != maze['start'] and
-                pos != goal_pos and
-                pos not in maze['coins']):
-                maze['coins'].append(pos)
+        cells = [list(cell) for cell in random.sample(self.free_cells(size), num_walls + num_coins)]
+        maze['walls'] = cells[:num_walls]
+        maze['coins'] = cells[num_walls:]
         
-        return maze
\ No newline at end of file
+        return maze
+
+class MazePool:
+    """Generates mazes for the next few levels in the background.
+
+    get() hands out a finished maze straight away and queues the levels after it; if
+    the maze for a level isn't ready yet it's generated on the spot instead. Pass a
+    ProcessPoolExecutor to generate in other processes.
+    """
+
+    def __init__(self, generator=None, ahead=3, executor=None):
+        self.generator = generator or MazeGenerator()
+        self.ahead = ahead  # Levels kept generating past the current one
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="maze")
+        self.pending = {}  # (level, size) -> Future
+
+    def prefetch(self, level, size=10):
+        """Make sure the mazes for level and the ones after it are being generated."""
+        wanted = {(next_level, size) for next_level in range(level, level + self.ahead)}
+        for key in list(self.pending):
+            if key not in wanted:  # A restart or a size change left these behind
+                self.pending.pop(key).cancel()
+        for key in sorted(wanted - self.pending.keys()):
+            self.pending[key] = self.executor.submit(self.generator.generate_maze, *key)
+
+    def get(self, level, size=10):
+        """Maze for a level, from the buffer if it's ready."""
+        future = self.pending.pop((level, size), None)
+        maze = None
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            maze = future.result()
+        elif future is not None:
+            future.cancel()
+        if maze is None:
+            maze = self.generator.generate_maze(level, size)
+        self.prefetch(level + 1, size)
+        return maze
+
+    def shutdown(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,92 @@
+"""Breadth-first search over escape_amaze's slide moves.
+
+Every move slides the ball until it hits a wall, block or the edge, so the
+only states are the cells a slide can stop on. With a SlideTable each move is
+one lookup. Benchmark candidate generation and solving with:
+
+    python solver.py --bench 5000 --level 5
+"""
+import argparse
+import time
+from collections import deque
+
+from game_state import DIRECTIONS, SOLID, maze_cells
+
+def slide_stop(cells, size, index, direction):
+    """Where a slide from index stops, walking the cells; for one-off searches where
+    building a whole SlideTable would cost more than the search."""
+    dx, dy = DIRECTIONS[direction]
+    x, y = index % size, index // size
+    while 0 <= x + dx < size and 0 <= y + dy < size and not cells[(y + dy) * size + x + dx] & SOLID:
+        x += dx
+        y += dy
+    return y * size + x
+
+def solve(cells, size, start, slides=None):
+    """Fewest slides from start to the goal as a list of directions (indices into
+    DIRECTIONS), or None if the goal can't be reached by sliding alone.
+
+    Uses the slide table when given one and walks slides on demand otherwise."""
+    goal = size - 1  # Top-right corner
+    start_index = start[1] * size + start[0]
+    if start_index == goal:
+        return []
+
+    came_from = {start_index: None}  # Cell -> (previous cell, direction)
+    queue = deque([start_index])
+    while queue:
+        index = queue.popleft()
+        for direction in range(4):
+            if slides is not None:
+                stop = slides.stops[index * 4 + direction]
+            else:
+                stop = slide_stop(cells, size, index, direction)
+            if stop in came_from:
+                continue
+            came_from[stop] = (index, direction)
+            if stop == goal:
+                moves = []
+                while came_from[stop] is not None:
+                    stop, direction = came_from[stop]
+                    moves.append(direction)
+                return moves[::-1]
+            queue.append(stop)
+    return None
+
+def solve_maze(maze_data):
+    """solve() for maze data as produced by MazeGenerator."""
+    return solve(maze_cells(maze_data), maze_data['size'], maze_data['start'])
+
+def benchmark(count, level, size):
+    from maze_generator import MazeGenerator
+
+    generator = MazeGenerator()
+    solvable = 0
+    total_moves = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        moves = solve_maze(generator.generate_fallback_maze(level, size))
+        if moves is not None:
+            solvable += 1
+            total_moves += len(moves)
+    elapsed = time.perf_counter() - start
+    print(f"Level {level}, {size}x{size}: {count} candidates in {elapsed:.2f} s "
+          f"({count / elapsed:.0f} generated and solved per second)")
+    print(f"Solvable: {solvable / count:.1%}, average optimal moves {total_moves / max(1, solvable):.1f}")
+
+    start = time.perf_counter()
+    for _ in range(count // 10):
+        generator.generate_maze(level, size)
+    elapsed = time.perf_counter() - start
+    print(f"Validated mazes: {count // 10 / elapsed:.0f} per second")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark maze generation and the slide solver")
+    parser.add_argument("--bench", type=int, default=5000, metavar="MAZES", help="candidate mazes to generate")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--size", type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.bench, args.level, args.size)
+
+if __name__ == "__main__":
+    main()
@@ -1,362 +1,515 @@
+import os
+from collections import deque
 import pygame
 import random
-import serial
+import sys
+import threading
 import time
 
-pygame.init()
-
 # Screen settings
 WIDTH, HEIGHT = 600, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Retro Monkey Run")
-
-# Load Images
-background_img = pygame.image.load("background.png").convert()
-background_img = pygame.transform.scale(background_img, (WIDTH, HEIGHT))
-player_sprite = pygame.image.load("retro_monkey.png").convert_alpha()
-player_sprite = pygame.transform.scale(player_sprite, (60, 120))
-tree_img = pygame.image.load("tree.png").convert_alpha()
-tree_img = pygame.transform.scale(tree_img, (80, 120))
-banana_img = pygame.image.load("banana.png").convert_alpha()
-banana_img = pygame.transform.scale(banana_img, (70, 70))
+
+# Assets live next to this file, so the game can be started from any directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Arduino settings
+SERIAL_PORT = '/dev/tty.usbmodem141101'
+SERIAL_BAUD = 9600
 
 # Lanes
 lanes = [75, 225, 375, 525]
-current_lane = 1
 
 # Player settings
 player_width, player_height = 60, 120
-player_rect = pygame.Rect(lanes[current_lane] - player_width // 2, HEIGHT - player_height - 15, player_width, player_height)
+
+# Timing: gameplay is simulated in seconds so speed and scoring don't depend on frame rate
+# (the tuning below was originally per frame at 60 FPS)
+MAX_SUBSTEP = 1 / 60  # Long frames are split so nothing moves more than a few pixels per step
+MAX_FRAME_TIME = 0.1  # A hitch longer than this is dropped rather than simulated
+score_rate = 60  # Points per second survived
+speed_ramp_interval = 5  # Seconds between speed increases
+speed_ramp = 12  # px/sec added every speed_ramp_interval
 
 # Obstacle settings
 obstacle_width, obstacle_height = 80, 120
-initial_obstacle_speed = 4
-obstacle_speed = initial_obstacle_speed
-obstacles = []
-spawn_timer = 0
+initial_obstacle_speed = 240  # px/sec
+obstacle_spawn_interval = 111 / 60  # Seconds between obstacle stacks
 
 # Coin settings
 coin_width, coin_height = 70, 70
-coin_speed = 4
-coins = []
-coin_spawn_timer = 0
-
-# Clock and score
-clock = pygame.time.Clock()
-score = 0
-font = pygame.font.SysFont("Courier", 36, True)
+coin_spawn_interval = 91 / 60  # Seconds between coins
 
 # Game states
 START, PLAYING, GAME_OVER, RESUME, WIN = 0, 1, 2, 3, 4
-game_state = START
-resume_selection = 0  # 0 for Resume/Play Again, 1 for Main Menu
-should_return_to_menu = False  # New flag for returning to menu
-
-# Connect to Arduino
-arduino = serial.Serial('/dev/tty.usbmodem141101', 9600, timeout=0.1)
 
 # Debounce timers
-last_command_time = 0
 command_cooldown = 200  # milliseconds
 
-# Drawing functions
-def draw():
-    screen.blit(background_img, (0, 0))
-    screen.blit(player_sprite, player_rect)
-
-    for obs in obstacles:
-        screen.blit(tree_img, obs)
-
-    for coin in coins:
-        screen.blit(banana_img, coin)
-
-    score_text = font.render(f"SCORE: {score}", True, (255, 255, 255))
-    screen.blit(score_text, (10, 10))
-
-    pygame.display.flip()
-
-def draw_start_screen():
-    screen.blit(background_img, (0, 0))
-    text = font.render("PRESS SPACE TO START", True, (255, 255, 255))
-    screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2))
-    pygame.display.flip()
-
-def draw_game_over_screen():
-    screen.blit(background_img, (0, 0))
-    
-    # Draw game over message
-    title_font = pygame.font.SysFont("Courier", 48, True)
-    info_font = pygame.font.SysFont("Courier", 24, True)
-    
-    title = title_font.render("GAME OVER", True, (255, 0, 0))
-    subtitle = title_font.render(f"Score: {score}", True, (255, 255, 255))
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
-    screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 120))
-    
-    info_msg = [
-        "Watch out for those trees!",
-        "",
-        "Arduino: D to select, SPACE to confirm"
-    ]
-    
-    for i, text in enumerate(info_msg):
-        info_text = info_font.render(text, True, (255, 255, 255))
-        screen.blit(info_text, (WIDTH//2 - info_text.get_width()//2, 200 + i*40))
-    
-    # Draw menu options side by side
-    play_color = (255, 255, 0) if resume_selection == 0 else (255, 255, 255)
-    menu_color = (255, 255, 0) if resume_selection == 1 else (255, 255, 255)
-    
-    play_text = font.render("Play Again", True, play_color)
-    menu_text = font.render("Main Menu", True, menu_color)
-    
-    # Calculate positions for side-by-side buttons
-    total_width = play_text.get_width() + menu_text.get_width() + 50  # 50px spacing between buttons
-    start_x = WIDTH//2 - total_width//2
-    
-    screen.blit(play_text, (start_x, 400))
-    screen.blit(menu_text, (start_x + play_text.get_width() + 50, 400))
-
-    pygame.display.flip()
-
-def draw_resume_screen():
-    screen.blit(background_img, (0, 0))
-    
-    # Draw "How to Play" information
-    title_font = pygame.font.SysFont("Courier", 48, True)
-    info_font = pygame.font.SysFont("Courier", 24, True)
-    
-    title = title_font.render("How to Play", True, (255, 255, 255))
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
-    
-    instructions = [
-        "Use WASD to control the monkey",
-        "A/D or Left/Right: Move between lanes",
-        "Collect bananas for points",
-        "Avoid trees",
-        "Press R for this menu",
-        "Arduino: D to select, SPACE to confirm"
-    ]
-    
-    for i, text in enumerate(instructions):
-        info_text = info_font.render(text, True, (255, 255, 255))
-        screen.blit(info_text, (WIDTH//2 - info_text.get_width()//2, 150 + i*40))
-    
-    # Draw menu options side by side
-    resume_color = (255, 255, 0) if resume_selection == 0 else (255, 255, 255)
-    menu_color = (255, 255, 0) if resume_selection == 1 else (255, 255, 255)
-    
-    resume_text = font.render("Resume", True, resume_color)
-    menu_text = font.render("Main Menu", True, menu_color)
-    
-    # Calculate positions for side-by-side buttons
-    total_width = resume_text.get_width() + menu_text.get_width() + 50  # 50px spacing between buttons
-    start_x = WIDTH//2 - total_width//2
-    
-    screen.blit(resume_text, (start_x, 400))
-    screen.blit(menu_text, (start_x + resume_text.get_width() + 50, 400))
-
-    pygame.display.flip()
-
-def draw_win_screen():
-    screen.blit(background_img, (0, 0))
-    
-    # Draw victory message
-    title_font = pygame.font.SysFont("Courier", 48, True)
-    info_font = pygame.font.SysFont("Courier", 24, True)
-    
-    title = title_font.render("VICTORY!", True, (255, 255, 0))
-    subtitle = title_font.render("Score: 3000", True, (255, 255, 255))
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, 50))
-    screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 120))
-    
-    congrats_msg = [
-        "Congratulations!",
-        "You've become the ultimate",
-        "banana collector!",
-        "",
-        "Arduino: D to select, SPACE to confirm"
-    ]
-    
-    for i, text in enumerate(congrats_msg):
-        info_text = info_font.render(text, True, (255, 255, 255))
-        screen.blit(info_text, (WIDTH//2 - info_text.get_width()//2, 200 + i*40))
-    
-    # Draw menu options side by side
-    play_color = (255, 255, 0) if resume_selection == 0 else (255, 255, 255)
-    menu_color = (255, 255, 0) if resume_selection == 1 else (255, 255, 255)
-    
-    play_text = font.render("Play Again", True, play_color)
-    menu_text = font.render("Main Menu", True, menu_color)
-    
-    # Calculate positions for side-by-side buttons
-    total_width = play_text.get_width() + menu_text.get_width() + 50  # 50px spacing between buttons
-    start_x = WIDTH//2 - total_width//2
-    
-    screen.blit(play_text, (start_x, 400))
-    screen.blit(menu_text, (start_x + play_text.get_width() + 50, 400))
-
-    pygame.display.flip()
-
-# Main game loop
-running = True
-while running:
-    clock.tick(60)
-
-    for event in pygame.event.get():
+# Serial input: a background thread reads Arduino lines and posts them as pygame events,
+# so menus can block on pygame.event.wait() for keys and Arduino commands alike
+SERIAL_EVENT = pygame.USEREVENT + 1
+
+KEY_COMMANDS = {  # Keyboard stand-ins for the Arduino's commands
+    pygame.K_SPACE: "SPACE",
+    pygame.K_a: "A",
+    pygame.K_LEFT: "A",
+    pygame.K_d: "D",
+    pygame.K_RIGHT: "D",
+    pygame.K_r: "R",
+}
+MENU_FPS = 10  # Menus only redraw on input, this caps how often they wake up
+FALLBACK_FPS = 60  # Render frame cap when the display can't pace frames with vsync
+MAX_VSYNC_RATE = 360  # Flip rates above this mean vsync isn't actually pacing frames
+VSYNC_PROBE_FRAMES = 10  # Flips timed at startup to check for vsync
+
+# Font registry: SysFont scans the system font list, so resolve each (face, size, bold) once
+fonts = {}
+
+def get_font(face, size, bold=False):
+    key = (face, size, bold)
+    if key not in fonts:
+        fonts[key] = pygame.font.SysFont(face, size, bold)
+    return fonts[key]
+
+# Text cache: rendered text surfaces keyed by (text, font, color)
+text_cache = {}
+
+def render_text(text, text_font, color):
+    key = (text, text_font, color)
+    if key not in text_cache:
+        if len(text_cache) > 256:  # Score strings keep changing, don't let them pile up
+            text_cache.clear()
+        text_cache[key] = text_font.render(text, True, color)
+    return text_cache[key]
+
+def load_image(name, size, alpha=True):
+    image = pygame.image.load(os.path.join(BASE_DIR, name))
+    image = image.convert_alpha() if alpha else image.convert()
+    return pygame.transform.scale(image, size)
+
+def lane_insert(lane_items, y):
+    # Keep a lane ordered lowest-on-screen first; spawns normally arrive in order, so this is an append
+    i = len(lane_items)
+    while i and lane_items[i - 1] < y:
+        i -= 1
+    lane_items.insert(i, y)
+
+def wait_for_events():
+    # Block until a key, Arduino command or window event arrives instead of redrawing at 60 FPS
+    event = pygame.event.wait(1000 // MENU_FPS)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+# Game engine: init() opens the window and devices, update(dt) advances gameplay by dt
+# seconds and render() draws the current state. Nothing touches the display or the
+# Arduino until it is needed, so the simulation can run headless.
+class MonkeyRun:
+    def __init__(self, serial_port=SERIAL_PORT, fps_cap=None):
+        self.serial_port = serial_port
+        self.screen = None
+        self.clock = None
+        self.fps_cap = fps_cap  # None: vsync paces rendering; 0 uncaps it
+        self.max_fps = FALLBACK_FPS
+        self.arduino = None
+        self.images = None  # Loaded on first render
+        self.timings = {}  # Startup phase durations in seconds
+        self.running = True
+        self.game_state = START
+        self.resume_selection = 0  # 0 for Resume/Play Again, 1 for Main Menu
+        self.last_command_time = 0
+        self.current_lane = 1
+        self.player_rect = pygame.Rect(lanes[self.current_lane] - player_width // 2, HEIGHT - player_height - 15, player_width, player_height)
+        self.spawn_timer = 0
+        self.coin_spawn_timer = 0
+        # Menu cache: the last composed menu screen, rebuilt only when its key (screen, selection, score)
+        # changes and presented only when it isn't already on screen
+        self.menu_cache = {"key": None, "surface": None, "presented": False}
+        self.reset()
+
+    def reset(self):
+        # Obstacles and coins are kept per lane, ordered from lowest on screen to highest.
+        # Each entry is its y at scroll 0; its screen y is that plus the shared scroll offset,
+        # so moving everything down is a single addition to self.scroll.
+        self.obstacles = [deque() for _ in lanes]
+        self.coins = [deque() for _ in lanes]
+        self.scroll = 0
+        self.elapsed = 0  # Simulated seconds of play
+        self.bonus = 0  # Points from bananas
+        self.score = 0
+        self.scroll_speed = initial_obstacle_speed  # Obstacles and coins always move together, px/sec
+
+    # Startup
+    def timed(self, phase, func):
+        start = time.perf_counter()
+        result = func()
+        self.timings[phase] = time.perf_counter() - start
+        return result
+
+    def init(self):
+        self.timed("pygame.init", pygame.init)
+        self.timed("display", self.open_display)
+        self.timed("arduino", self.open_arduino)
+        self.clock = pygame.time.Clock()
+
+    def open_display(self):
+        # pygame only offers vsync on SCALED or OPENGL displays. It can also fall back to a
+        # software renderer without vsync and without raising, so pacing is measured below.
+        try:
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.SCALED, vsync=1)
+        except pygame.error:
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Retro Monkey Run")
+        if self.fps_cap is not None:
+            self.max_fps = self.fps_cap
+        else:
+            # With working vsync every flip waits for the display; the cap is then only a ceiling
+            # above its refresh rate so a display that stops pacing (e.g. minimised) can't spin a core
+            rate = self.measure_flip_rate()
+            self.max_fps = 2 * rate if rate <= MAX_VSYNC_RATE else FALLBACK_FPS
+
+    def measure_flip_rate(self):
+        # Flips per second over a few blank frames; thousands means nothing is waiting for the display
+        self.screen.fill((0, 0, 0))
+        pygame.display.flip()
+        start = time.perf_counter()
+        for _ in range(VSYNC_PROBE_FRAMES):
+            pygame.display.flip()
+        return round(VSYNC_PROBE_FRAMES / max(time.perf_counter() - start, 1e-6))
+
+    def open_arduino(self):
+        # A missing Arduino leaves the game on keyboard controls instead of crashing
+        try:
+            import serial
+            self.arduino = serial.Serial(self.serial_port, SERIAL_BAUD, timeout=0.1)
+        except Exception as e:
+            print(f"[ERROR] Could not connect to Arduino: {e}")
+            self.arduino = None
+            return
+        threading.Thread(target=self.serial_reader, daemon=True).start()
+
+    def serial_reader(self):
+        while True:
+            try:
+                line = self.arduino.readline()
+            except Exception:  # Device unplugged or closed on exit
+                return
+            if line:
+                command = line.decode('utf-8', errors='ignore').strip()
+                pygame.event.post(pygame.event.Event(SERIAL_EVENT, command=command))
+
+    def load_assets(self):
+        self.images = {
+            "background": load_image("background.png", (WIDTH, HEIGHT), alpha=False),
+            "player": load_image("retro_monkey.png", (60, 120)),
+            "tree": load_image("tree.png", (80, 120)),
+            "banana": load_image("banana.png", (70, 70)),
+        }
+        self.font = get_font("Courier", 36, True)
+        self.title_font = get_font("Courier", 48, True)
+        self.info_font = get_font("Courier", 24, True)
+
+    # Input
+    def handle_event(self, event):
         if event.type == pygame.QUIT:
-            running = False
+            self.running = False
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            self.menu_cache["presented"] = False  # Window was uncovered, show the menu again
         elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_r and game_state == PLAYING:
-                game_state = RESUME
-            elif game_state == RESUME:
-                if event.key == pygame.K_d:
-                    resume_selection = 1  # Move to Main Menu
-                elif event.key == pygame.K_a:
-                    resume_selection = 0  # Move to Resume
-                elif event.key == pygame.K_SPACE:
-                    if resume_selection == 1:  # Main Menu selected
-                        print("main menu")
-                        game_state = START
-                        obstacles.clear()
-                        coins.clear()
-                        score = 0
-                        obstacle_speed = initial_obstacle_speed
-                        coin_speed = initial_obstacle_speed
-                    else:  # Resume selected
-                        game_state = PLAYING
-
-    # Handle Arduino input
-    if arduino.in_waiting:
-        command = arduino.readline().decode('utf-8').strip()
-        now = pygame.time.get_ticks()
-
-        if now - last_command_time > command_cooldown:
-            last_command_time = now
-
-            if game_state == START and command == "SPACE":
-                game_state = PLAYING
-            elif game_state == GAME_OVER:
-                if command == "D":
-                    resume_selection = 1  # Move to Main Menu
-                elif command == "A":
-                    resume_selection = 0  # Move to Play Again
-                elif command == "SPACE":
-                    if resume_selection == 1:  # Main Menu selected
-                        print("main menu")
-                        game_state = START
-                        obstacles.clear()
-                        coins.clear()
-                        score = 0
-                        obstacle_speed = initial_obstacle_speed
-                        coin_speed = initial_obstacle_speed
-                    else:  # Play Again selected
-                        game_state = PLAYING
-                        obstacles.clear()
-                        coins.clear()
-                        score = 0
-                        obstacle_speed = initial_obstacle_speed
-                        coin_speed = initial_obstacle_speed
-            elif game_state == WIN:
-                if command == "D":
-                    resume_selection = 1  # Move to Main Menu
-                elif command == "A":
-                    resume_selection = 0  # Move to Play Again
-                elif command == "SPACE":
-                    if resume_selection == 1:  # Main Menu selected
-                        print("main menu")
-                        game_state = START
-                        obstacles.clear()
-                        coins.clear()
-                        score = 0
-                        obstacle_speed = initial_obstacle_speed
-                        coin_speed = initial_obstacle_speed
-                    else:  # Play Again selected
-                        game_state = PLAYING
-                        obstacles.clear()
-                        coins.clear()
-                        score = 0
-                        obstacle_speed = initial_obstacle_speed
-                        coin_speed = initial_obstacle_speed
-            elif game_state == RESUME:
-                if command == "D":
-                    resume_selection = 1  # Move to Main Menu
-                elif command == "A":
-                    resume_selection = 0  # Move to Resume
-                elif command == "SPACE":
-                    if resume_selection == 1:  # Main Menu selected
-                        print("main menu")
-                        game_state = START
-                        obstacles.clear()
-                        coins.clear()
-                        score = 0
-                        obstacle_speed = initial_obstacle_speed
-                        coin_speed = initial_obstacle_speed
-                    else:  # Resume selected
-                        game_state = PLAYING
-            elif game_state == PLAYING:
-                if command == "A" and current_lane > 0:
-                    current_lane -= 1
-                elif command == "D" and current_lane < 3:
-                    current_lane += 1
-                elif command == "R":  # Add R command for Arduino to open resume screen
-                    game_state = RESUME
-
-    if game_state == PLAYING:
-        spawn_timer += 1
-        coin_spawn_timer += 1
-        score += 1
-        if score % 300 == 0:
-            obstacle_speed += 0.2
-            coin_speed += 0.2
+            self.handle_key(event.key)
+        # Handle Arduino input
+        elif event.type == SERIAL_EVENT:
+            now = pygame.time.get_ticks()
+            if now - self.last_command_time > command_cooldown:
+                self.last_command_time = now
+                self.handle_command(event.command)
+
+    def handle_key(self, key):
+        # The keyboard sends the same commands as the Arduino, so the game is playable without one
+        command = KEY_COMMANDS.get(key)
+        if command:
+            self.handle_command(command)
+
+    def handle_command(self, command):
+        if self.game_state == START and command == "SPACE":
+            self.game_state = PLAYING
+        elif self.game_state in (GAME_OVER, WIN, RESUME):
+            if command == "D":
+                self.resume_selection = 1  # Move to Main Menu
+            elif command == "A":
+                self.resume_selection = 0  # Move to Play Again / Resume
+            elif command == "SPACE":
+                self.confirm_selection(play_again=self.game_state != RESUME)
+        elif self.game_state == PLAYING:
+            if command == "A" and self.current_lane > 0:
+                self.current_lane -= 1
+            elif command == "D" and self.current_lane < 3:
+                self.current_lane += 1
+            elif command == "R":  # Add R command for Arduino to open resume screen
+                self.game_state = RESUME
+
+    def confirm_selection(self, play_again):
+        if self.resume_selection == 1:  # Main Menu selected
+            print("main menu")
+            self.game_state = START
+            self.reset()
+        elif play_again:  # Play Again selected
+            self.game_state = PLAYING
+            self.reset()
+        else:  # Resume selected
+            self.game_state = PLAYING
+
+    # Simulation
+    def update(self, dt):
+        # Advance gameplay by dt seconds in steps short enough that collisions can't be skipped
+        dt = min(dt, MAX_FRAME_TIME)
+        while dt > 0 and self.game_state == PLAYING:
+            step_dt = min(dt, MAX_SUBSTEP)
+            self.step(step_dt)
+            dt -= step_dt
+
+    def step(self, dt):
+        self.elapsed += dt
+        self.spawn_timer += dt
+        self.coin_spawn_timer += dt
+        self.score = int(self.elapsed * score_rate) + self.bonus
+        self.scroll_speed = initial_obstacle_speed + speed_ramp * int(self.elapsed // speed_ramp_interval)
 
         # Check for win condition
-        if score >= 3000:
-            game_state = WIN
+        if self.score >= 3000:
+            self.game_state = WIN
 
-        player_rect.x = lanes[current_lane] - player_width // 2
+        self.player_rect.x = lanes[self.current_lane] - player_width // 2
 
         obstacle_lane = None
-        if spawn_timer > 110:
-            obstacle_lane = random.choice(lanes)
+        if self.spawn_timer > obstacle_spawn_interval:
+            obstacle_lane = random.randrange(len(lanes))
             stack_height = random.randint(1, 3)
             for i in range(stack_height):
-                obstacles.append(pygame.Rect(obstacle_lane - obstacle_width // 2, -(i+1)*obstacle_height, obstacle_width, obstacle_height))
-            spawn_timer = 0
+                lane_insert(self.obstacles[obstacle_lane], -(i+1)*obstacle_height - self.scroll)
+            self.spawn_timer -= obstacle_spawn_interval
 
-        if coin_spawn_timer > 90:
-            available_lanes = lanes[:]
-            if obstacle_lane and obstacle_lane in available_lanes:
-                available_lanes.remove(obstacle_lane)
+        if self.coin_spawn_timer > coin_spawn_interval:
+            available_lanes = [lane for lane in range(len(lanes)) if lane != obstacle_lane]
             coin_lane = random.choice(available_lanes)
-            coin_rect = pygame.Rect(coin_lane - coin_width // 2, -coin_height, coin_width, coin_height)
-            coins.append(coin_rect)
-            coin_spawn_timer = 0
-
-        for obs in obstacles[:]:
-            obs.y += obstacle_speed
-            if obs.top > HEIGHT:
-                obstacles.remove(obs)
-            if obs.colliderect(player_rect):
-                game_state = GAME_OVER
-
-        for coin in coins[:]:
-            coin.y += coin_speed
-            if coin.top > HEIGHT:
-                coins.remove(coin)
-            if coin.collidepoint(player_rect.centerx, player_rect.top):
-                score += 100
-                coins.remove(coin)
-
-        draw()
-
-    elif game_state == START:
-        draw_start_screen()
-    elif game_state == GAME_OVER:
-        draw_game_over_screen()
-    elif game_state == RESUME:
-        draw_resume_screen()
-    elif game_state == WIN:
-        draw_win_screen()
-
-pygame.quit()
+            lane_insert(self.coins[coin_lane], -coin_height - self.scroll)
+            self.coin_spawn_timer -= coin_spawn_interval
+
+        self.scroll += self.scroll_speed * dt
+
+        # Despawn from the front of each lane once it scrolls off the bottom
+        for lane_items in self.obstacles + self.coins:
+            while lane_items and lane_items[0] + self.scroll > HEIGHT:
+                lane_items.popleft()
+
+        # Only the player's lane can collide, and only its front few entries reach the player
+        player_top, player_bottom = self.player_rect.top, self.player_rect.bottom
+        for y in self.obstacles[self.current_lane]:
+            top = y + self.scroll
+            if top + obstacle_height <= player_top:
+                break  # This and everything behind it is still above the player
+            if top < player_bottom:
+                self.game_state = GAME_OVER
+                break
+
+        lane_coins = self.coins[self.current_lane]
+        for i, y in enumerate(lane_coins):
+            top = y + self.scroll
+            if top + coin_height <= player_top:
+                break
+            if top <= player_top:  # Coin covers the top centre of the player
+                self.bonus += 100
+                self.score += 100
+                del lane_coins[i]
+                break
+
+    # Drawing
+    def render(self):
+        if self.images is None:
+            self.timed("assets", self.load_assets)
+
+        if self.game_state == PLAYING:
+            self.draw()
+        elif self.game_state == START:
+            self.draw_start_screen()
+        elif self.game_state == GAME_OVER:
+            self.draw_game_over_screen()
+        elif self.game_state == RESUME:
+            self.draw_resume_screen()
+        elif self.game_state == WIN:
+            self.draw_win_screen()
+
+    def draw(self):
+        screen = self.screen
+        screen.blit(self.images["background"], (0, 0))
+        screen.blit(self.images["player"], self.player_rect)
+
+        for lane, lane_obstacles in zip(lanes, self.obstacles):
+            for y in lane_obstacles:
+                screen.blit(self.images["tree"], (lane - obstacle_width // 2, y + self.scroll))
+
+        for lane, lane_coins in zip(lanes, self.coins):
+            for y in lane_coins:
+                screen.blit(self.images["banana"], (lane - coin_width // 2, y + self.scroll))
+
+        score_text = self.font.render(f"SCORE: {self.score}", True, (255, 255, 255))
+        screen.blit(score_text, (10, 10))
+
+        pygame.display.flip()
+        self.menu_cache["presented"] = False  # Gameplay drew over the menu
+
+    def draw_cached_menu(self, key, build):
+        menu_cache = self.menu_cache
+        if menu_cache["key"] != key:
+            surface = self.images["background"].copy()
+            build(surface)
+            menu_cache["key"] = key
+            menu_cache["surface"] = surface
+            menu_cache["presented"] = False
+        if not menu_cache["presented"]:
+            self.screen.blit(menu_cache["surface"], (0, 0))
+            pygame.display.flip()
+            menu_cache["presented"] = True
+
+    def draw_start_screen(self):
+        def build(surface):
+            text = render_text("PRESS SPACE TO START", self.font, (255, 255, 255))
+            surface.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2))
+
+        self.draw_cached_menu((START,), build)
+
+    def draw_menu_options(self, surface, left_label, right_label):
+        # Draw menu options side by side
+        left_color = (255, 255, 0) if self.resume_selection == 0 else (255, 255, 255)
+        right_color = (255, 255, 0) if self.resume_selection == 1 else (255, 255, 255)
+
+        left_text = render_text(left_label, self.font, left_color)
+        right_text = render_text(right_label, self.font, right_color)
+
+        # Calculate positions for side-by-side buttons
+        total_width = left_text.get_width() + right_text.get_width() + 50  # 50px spacing between buttons
+        start_x = WIDTH//2 - total_width//2
+
+        surface.blit(left_text, (start_x, 400))
+        surface.blit(right_text, (start_x + left_text.get_width() + 50, 400))
+
+    def draw_info_lines(self, surface, lines, top):
+        for i, text in enumerate(lines):
+            info_text = render_text(text, self.info_font, (255, 255, 255))
+            surface.blit(info_text, (WIDTH//2 - info_text.get_width()//2, top + i*40))
+
+    def draw_game_over_screen(self):
+        def build(surface):
+            # Draw game over message
+            title = render_text("GAME OVER", self.title_font, (255, 0, 0))
+            subtitle = render_text(f"Score: {self.score}", self.title_font, (255, 255, 255))
+            surface.blit(title, (WIDTH//2 - title.get_width()//2, 50))
+            surface.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 120))
+
+            info_msg = [
+                "Watch out for those trees!",
+                "",
+                "Arduino: D to select, SPACE to confirm"
+            ]
+            self.draw_info_lines(surface, info_msg, 200)
+            self.draw_menu_options(surface, "Play Again", "Main Menu")
+
+        self.draw_cached_menu((GAME_OVER, self.resume_selection, self.score), build)
+
+    def draw_resume_screen(self):
+        def build(surface):
+            # Draw "How to Play" information
+            title = render_text("How to Play", self.title_font, (255, 255, 255))
+            surface.blit(title, (WIDTH//2 - title.get_width()//2, 50))
+
+            instructions = [
+                "Use WASD to control the monkey",
+                "A/D or Left/Right: Move between lanes",
+                "Collect bananas for points",
+                "Avoid trees",
+                "Press R for this menu",
+                "Arduino: D to select, SPACE to confirm"
+            ]
+            self.draw_info_lines(surface, instructions, 150)
+            self.draw_menu_options(surface, "Resume", "Main Menu")
+
+        self.draw_cached_menu((RESUME, self.resume_selection), build)
+
+    def draw_win_screen(self):
+        def build(surface):
+            # Draw victory message
+            title = render_text("VICTORY!", self.title_font, (255, 255, 0))
+            subtitle = render_text("Score: 3000", self.title_font, (255, 255, 255))
+            surface.blit(title, (WIDTH//2 - title.get_width()//2, 50))
+            surface.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 120))
+
+            congrats_msg = [
+                "Congratulations!",
+                "You've become the ultimate",
+                "banana collector!",
+                "",
+                "Arduino: D to select, SPACE to confirm"
+            ]
+            self.draw_info_lines(surface, congrats_msg, 200)
+            self.draw_menu_options(surface, "Play Again", "Main Menu")
+
+        self.draw_cached_menu((WIN, self.resume_selection), build)
+
+    # Main game loop
+    def run(self):
+        while self.running:
+            if self.game_state == PLAYING:
+                dt = self.clock.tick(self.max_fps) / 1000  # Paced by vsync unless a cap is set
+                events = pygame.event.get()
+            else:
+                dt = 0
+                events = wait_for_events()  # Menus are static, sleep until input arrives
+                self.clock.tick()  # Don't count menu time as gameplay
+
+            for event in events:
+                self.handle_event(event)
+
+            if self.game_state == PLAYING:
+                self.update(dt)
+            self.render()
+
+        if self.arduino:
+            self.arduino.close()
+        pygame.quit()
+
+
+def benchmark(frames, fps=60):
+    # Run the simulation headless at a fixed frame rate with a lane-switching bot, restarting on game over
+    game = MonkeyRun()
+    game.game_state = PLAYING
+    start = time.perf_counter()
+    for frame in range(frames):
+        if frame % fps == 0:
+            game.current_lane = random.randrange(len(lanes))
+        game.update(1 / fps)
+        if game.game_state != PLAYING:
+            game.reset()
+            game.game_state = PLAYING
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames at {fps} FPS in {elapsed:.3f} s ({frames / elapsed:.0f} frames/s)")
+
+
+def main():
+    # python game.py [--timings] [--fps CAP] [--bench FRAMES [FPS]]; --fps 0 uncaps rendering
+    if "--bench" in sys.argv:
+        args = sys.argv[sys.argv.index("--bench") + 1:]
+        benchmark(int(args[0]), int(args[1]) if len(args) > 1 else 60)
+        return
+
+    fps_cap = int(sys.argv[sys.argv.index("--fps") + 1]) if "--fps" in sys.argv else None
+    game = MonkeyRun(fps_cap=fps_cap)
+    game.init()
+    game.render()  # Loads assets and shows the first frame
+    if "--timings" in sys.argv:
+        for phase, seconds in game.timings.items():
+            print(f"{phase}: {seconds * 1000:.1f} ms")
+    game.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Serial input for racing: any number of devices read by one thread.
+
+The thread sleeps in select() until a device has data, reads whatever is
+waiting without blocking and hands every complete line on, tagged with the
+device and the player bound to it. select() only works on serial ports where
+they are file descriptors, so devices need a POSIX system (Linux, macOS);
+elsewhere open() raises and the game falls back to the keyboard.
+Pseudo-terminals stand in for devices:
+
+    python devices.py --selftest 8
+"""
+import argparse
+import os
+import selectors
+import socket
+import threading
+import time
+
+import serial
+
+
+class Device:
+    def __init__(self, path, port, player):
+        self.path = path
+        self.port = port
+        self.player = player  # None for a device that sends one command per player (SPACE, A)
+        self.buffer = b""  # Partial line read so far
+
+
+class DeviceMux:
+    def __init__(self, post=None, baudrate=9600):
+        self.post = post  # Called from the reader thread as post(command, player, path, stamp)
+        self.baudrate = baudrate
+        self.selector = selectors.DefaultSelector()
+        self.devices = []
+        self.thread = None
+        self.closed = False
+        # Socket pair so close() can wake the thread out of select(); unlike a pipe it can be
+        # selected on every platform, so creating a mux never fails
+        self.wake_read, self.wake_write = socket.socketpair()
+        self.wake_read.setblocking(False)
+        self.selector.register(self.wake_read, selectors.EVENT_READ, None)
+
+    def open(self, path, player=None):
+        if os.name != "posix":
+            raise OSError("serial devices can only be multiplexed on POSIX systems")
+        port = serial.Serial(path, self.baudrate, timeout=0)  # timeout=0: reads never block
+        device = Device(path, port, player)
+        self.devices.append(device)
+        self.selector.register(port.fileno(), selectors.EVENT_READ, device)
+        return port
+
+    def poll(self, timeout=None):
+        # Wait up to timeout for input; returns (command, player, path, stamp) for every complete line
+        lines = []
+        for key, _ in self.selector.select(timeout):
+            device = key.data
+            if device is None:
+                self.wake_read.recv(512)
+                continue
+            try:
+                data = device.port.read(device.port.in_waiting or 1)
+            except (serial.SerialException, OSError):  # Unplugged: stop watching it
+                self.selector.unregister(key.fd)
+                continue
+            stamp = time.perf_counter()  # Taken on arrival, like the old single-device reader
+            *complete, device.buffer = (device.buffer + data).split(b"\n")
+            for line in complete:
+                command = line.decode("utf-8", errors="ignore").strip()
+                if command:
+                    lines.append((command, device.player, device.path, stamp))
+        return lines
+
+    def run(self):
+        while not self.closed:
+            for line in self.poll():
+                self.post(*line)
+
+    def start(self):
+        if self.devices and self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def close(self):
+        self.closed = True
+        self.wake_write.send(b"x")
+        if self.thread is not None:
+            self.thread.join(1)
+        for device in self.devices:
+            device.port.close()
+        self.selector.close()
+        self.wake_read.close()
+        self.wake_write.close()
+
+
+def selftest(count, lines_per_player):
+    # One pty per player; the master ends play the devices. Writes are interleaved and split
+    # mid-line to check that lines are reassembled and routed to the right player.
+    mux = DeviceMux()
+    masters = []
+    for player in range(count):
+        master, slave = os.openpty()
+        mux.open(os.ttyname(slave), player)
+        os.close(slave)  # pyserial has its own descriptor
+        masters.append(master)
+
+    received = [[] for _ in range(count)]
+    start = time.perf_counter()
+    for number in range(lines_per_player):
+        for master in masters:
+            os.write(master, b"SPA")
+        for master in masters:
+            os.write(master, f"CE {number}\r\n".encode())
+        for command, player, path, stamp in mux.poll(0):
+            received[player].append(command)
+    while sum(map(len, received)) < count * lines_per_player:
+        polled = mux.poll(1)
+        if not polled:
+            break
+        for command, player, path, stamp in polled:
+            received[player].append(command)
+    elapsed = time.perf_counter() - start
+
+    expected = [f"SPACE {number}" for number in range(lines_per_player)]
+    ok = all(commands == expected for commands in received)
+    total = sum(map(len, received))
+    print(f"{count} devices, {total} lines in {elapsed:.3f} s ({total / elapsed:.0f} lines/s): {'OK' if ok else 'MISMATCH'}")
+    mux.close()
+    for master in masters:
+        os.close(master)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the serial multiplexer against pseudo-terminals")
+    parser.add_argument("--selftest", type=int, default=8, metavar="DEVICES")
+    parser.add_argument("--lines", type=int, default=1000, help="lines sent by each device")
+    args = parser.parse_args()
+    raise SystemExit(0 if selftest(args.selftest, args.lines) else 1)
+
+
+if __name__ == "__main__":
+    main()
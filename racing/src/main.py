@@ -1,18 +1,26 @@
+import argparse
+import os
+from collections import deque
 import pygame
 import random
 import time
-import serial
+from devices import DeviceMux
 
 # Game Constants
 WIDTH, HEIGHT = 600, 600
 CAR_WIDTH, CAR_HEIGHT = 30, 60
 TRACK_Y = HEIGHT // 4
+FINISH_LINE_X = WIDTH - 100
 FPS = 60
-BAR_SPEED = 2
+MENU_FPS = 10  # Menus sleep until input arrives, this caps how often they wake up
+BAR_LENGTH = 200  # Length of the sliding bar track in px
+BAR_SPEED = 2 * FPS  # Starting bar speed, px/sec
+MAX_BAR_SPEED = 5 * FPS
+BAR_SPEED_STEP = 0.2 * FPS  # Bar speed added per difficulty level
 MAX_HITS = 3
 WRONG_HITS_LIMIT = 3
 move_increment = 40
-command_cooldown = 100
+command_cooldown = 100  # ms between accepted commands from one serial device
 
 # Colors
 WHITE = (255, 255, 255)
@@ -26,20 +34,97 @@ GRAY = (128, 128, 128)
 pygame.init()
 font = pygame.font.Font(None, 36)
 
+# Serial input: one background thread reads every device (the Arduino and any per-player
+# devices) and posts each line as a pygame event, so the game and menu loops see keys and
+# serial commands in the same event queue
+SERIAL_EVENT = pygame.USEREVENT + 1
+ARDUINO_PORT = '/dev/tty.usbmodem141101'
+MAX_PLAYERS = 8
+
+def post_serial(command, player, device, stamp):
+    # stamp is taken on arrival, before the event waits for the next frame
+    pygame.event.post(pygame.event.Event(SERIAL_EVENT, command=command, player=player, device=device, time=stamp))
+
+devices = DeviceMux(post_serial)
+
 try:
-    arduino = serial.Serial('/dev/tty.usbmodem141101', 9600, timeout=0.1)
-    print("Connected to Arduino on /dev/tty.usbmodem141101")
-except:
+    arduino = devices.open(ARDUINO_PORT)  # Sends SPACE for Player 1 and A for Player 2
+    print(f"Connected to Arduino on {ARDUINO_PORT}")
+except Exception:
     arduino = None
     print("No Arduino found. Game will use keyboard controls only.")
 
-last_command_time = pygame.time.get_ticks()
-command_cooldown = 100
-
 # Screen setup
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Retro Racing Arcade")
 
+def wait_for_frame(deadline):
+    # Sleep until the next frame is due, waking for every event so keys get a timestamp close to
+    # when they arrived rather than when the frame started. Serial events carry their own.
+    stamped = [(event, getattr(event, "time", time.perf_counter())) for event in pygame.event.get()]
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return stamped
+        event = pygame.event.wait(max(1, int(remaining * 1000)))
+        now = time.perf_counter()
+        for event in [event] + pygame.event.get():
+            if event.type != pygame.NOEVENT:
+                stamped.append((event, getattr(event, "time", now)))
+
+def wait_for_events():
+    # Block until a key, Arduino command or window event arrives instead of spinning at 100% CPU
+    event = pygame.event.wait(1000 // MENU_FPS)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+# Asset cache: images are loaded, scaled and converted once and shared by every match
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+assets = {}
+
+def load_assets():
+    if not assets:
+        background_image = pygame.image.load(os.path.join(ASSET_DIR, "background.jpeg")).convert()
+        assets["background"] = pygame.transform.scale(background_image, (WIDTH, HEIGHT))
+
+        car1_image = pygame.image.load(os.path.join(ASSET_DIR, "car1.png")).convert_alpha()
+        car2_image = pygame.image.load(os.path.join(ASSET_DIR, "car2.png")).convert_alpha()
+        assets["car1"] = pygame.transform.scale(car1_image, (70, 30))
+        assets["car2"] = pygame.transform.scale(car2_image, (70, 30))
+
+        finish_line = pygame.image.load(os.path.join(ASSET_DIR, "finish.png")).convert_alpha()
+        finish_line = pygame.transform.scale(finish_line, (600, 100))
+        assets["finish_line"] = pygame.transform.rotate(finish_line, 90)
+
+        # Static backdrop: background, finish line image and finish line, composed once
+        backdrop = assets["background"].copy()
+        backdrop.blit(assets["finish_line"], (FINISH_LINE_X, 0))
+        pygame.draw.line(backdrop, FINISH_LINE_COLOR, (FINISH_LINE_X, 0), (FINISH_LINE_X, HEIGHT), 5)
+        assets["backdrop"] = backdrop
+
+        # Pre-rendered labels
+        instructions = [
+            "Player 1: Press SPACE in green zone",
+            "Player 2: Press A in green zone",
+            "Press R to pause",
+            "Green zone shrinks as you progress!"
+        ]
+        assets["instructions"] = [font.render(instruction, True, BLACK) for instruction in instructions]
+        assets["bar_label"] = font.render("Hit in Green Zone!", True, BLACK)
+    return assets
+
+# Text cache: HUD strings are re-rendered only when their text changes
+text_cache = {}
+
+def render_text(text, color=BLACK):
+    key = (text, color)
+    if key not in text_cache:
+        if len(text_cache) > 256:  # Scores keep changing, don't let old strings pile up
+            text_cache.clear()
+        text_cache[key] = font.render(text, True, color)
+    return text_cache[key]
+
 # Player class
 class PlayerCar:
     def __init__(self, x, y, controls, car_image, speed=0):
@@ -56,386 +141,409 @@ class PlayerCar:
     def draw(self, screen):
         screen.blit(self.car_image, (self.x, self.y))  # Draw the car image
 
-def game_loop():
-    global last_command_time
-    
-    # Initialize game objects and variables
-    background_image = pygame.image.load('../background.jpeg')
-    background_image = pygame.transform.scale(background_image, (WIDTH, HEIGHT))
-
-    car1_image = pygame.image.load("../car1.png")
-    car2_image = pygame.image.load("../car2.png")
-    finish_line = pygame.image.load("../finish.png")
-
-    car1_image = pygame.transform.scale(car1_image, (70, 30))
-    car2_image = pygame.transform.scale(car2_image, (70, 30))
-    finish_line = pygame.transform.scale(finish_line, (600, 100))
-    finish_line = pygame.transform.rotate(finish_line, 90)
-    
-    player1 = PlayerCar(50, HEIGHT//3, {"up": pygame.K_UP, "down": pygame.K_DOWN}, car1_image)
-    player2 = PlayerCar(50, 2*HEIGHT//3, {"up": pygame.K_w, "down": pygame.K_s}, car2_image)
-    
-    # Game state variables
-    running = True
-    clock = pygame.time.Clock()
-    bar_position = 100
-    bar_direction = 1
-    
-    # Dynamic success zone variables
+# Bar phase: the sliding bar between two success zone moves. The bar's position is a function
+# of time, so a hit can be judged at the instant it arrived instead of at the next frame.
+class BarPhase:
+    def __init__(self, start, position, direction, speed, zone):
+        self.start = start
+        self.speed = speed  # px/sec
+        self.zone = zone  # Success zone in effect during this phase
+        # Distance into one back-and-forth lap (0 .. 2 * BAR_LENGTH) at the start of the phase
+        self.offset = position if direction > 0 else 2 * BAR_LENGTH - position
+
+    def lap(self, t):
+        return (self.offset + self.speed * (t - self.start)) % (2 * BAR_LENGTH)
+
+    def position(self, t):
+        lap = self.lap(t)
+        return lap if lap <= BAR_LENGTH else 2 * BAR_LENGTH - lap
+
+    def direction(self, t):
+        return 1 if self.lap(t) < BAR_LENGTH else -1
+
+def lane_y(index, count):
+    # Top of a player's car
+    if count <= 2:
+        return (index + 1) * HEIGHT // 3
+    return 80 + index * (HEIGHT - 100) // count
+
+# Match class: all state for one race, reset in place for a rematch
+class Match:
+    # Dynamic success zone settings
     min_zone_width = 20  # Minimum width of green zone
     max_zone_width = 80  # Maximum width of green zone
-    current_zone_width = 40  # Starting width
     zone_shrink_rate = 2  # How much to shrink by each time
-    zone_move_timer = pygame.time.get_ticks()
-    zone_move_delay = 3000  # Move zone every 3 seconds
-    success_zone = [80, 120]  # Initial success zone
-    
-    hit_count1 = hit_count2 = 0
-    wrong_hits1 = wrong_hits2 = 0
-    finish_line_x = WIDTH - 100
-    
-    # Score variables
-    total_score1 = total_score2 = 0
-    start_time = time.time()
-    difficulty_level = 1
-
-    def update_success_zone():
-        nonlocal current_zone_width, success_zone, difficulty_level
+    zone_move_delay = 3  # Move zone every 3 seconds
+    finish_line_x = FINISH_LINE_X
+
+    def __init__(self, assets, player_count=2, rng=random, clock=time.perf_counter):
+        self.assets = assets
+        # Zone moves draw from rng and match time comes from clock; networked matches pass a
+        # seeded Random and a tick clock so both cabinets see the same bar and zone
+        self.rng = rng
+        self.clock = clock
+        # Two players get the classic layout with a labelled bar above each car; more players
+        # share the screen in compact lanes
+        self.compact = player_count > 2
+        self.bar_label = None if self.compact else assets["bar_label"]
+        self.lanes = [lane_y(index, player_count) for index in range(player_count)]
+        self.bar_ys = [y - 26 if self.compact else y - 50 for y in self.lanes]
+        cars = [assets["car1"], assets["car2"]]
+        self.players = [PlayerCar(50, y, None, cars[index % 2]) for index, y in enumerate(self.lanes)]
+        self.names = [f"Player {index + 1}" for index in range(player_count)]
+        self.labels = self.names  # Shown next to each compact lane, game_loop adds the bound key
+        self.reset()
+
+    def reset(self):
+        for player in self.players:
+            player.x = 50
+            player.speed = 0
+        # Match time is the clock minus time spent paused
+        self.paused_total = 0
+        self.paused_at = None
+        self.start_time = self.now()
+
+        self.bar_position = 100
+        self.current_zone_width = 40  # Starting width
+        self.success_zone = [80, 120]  # Initial success zone
+        self.bar_track = build_bar_track(self.bar_label, self.success_zone)
+        self.next_zone_time = self.start_time + self.zone_move_delay
+        self.phases = deque([BarPhase(self.start_time, self.bar_position, 1, BAR_SPEED, self.success_zone)], maxlen=4)
+
+        # Per-player hit counts, wrong hits and scores, indexed like self.players
+        self.hit_counts = [0] * len(self.players)
+        self.wrong_hits = [0] * len(self.players)
+        self.total_scores = [0] * len(self.players)
+        self.knocked_out = [False] * len(self.players)  # Too many wrong hits
+        self.difficulty_level = 1
+        self.winner = None
+
+        self.show_instructions = True
+
+    def update_success_zone(self):
         # Shrink the zone as game progresses
-        current_zone_width = int(max(min_zone_width, max_zone_width - (difficulty_level * zone_shrink_rate)))
-        
+        self.current_zone_width = int(max(self.min_zone_width, self.max_zone_width - (self.difficulty_level * self.zone_shrink_rate)))
+
         # Randomly position the zone, ensuring it stays within bounds
-        zone_start = random.randint(0, int(200 - current_zone_width))
-        success_zone = [zone_start, zone_start + current_zone_width]
-        
+        zone_start = self.rng.randint(0, int(200 - self.current_zone_width))
+        self.success_zone = [zone_start, zone_start + self.current_zone_width]
+        self.bar_track = build_bar_track(self.bar_label, self.success_zone)
+
         # Increase difficulty
-        difficulty_level += 0.5
-        
+        self.difficulty_level += 0.5
+
         # Increase bar speed with difficulty
-        return min(5, BAR_SPEED + (difficulty_level * 0.2))
+        return min(MAX_BAR_SPEED, BAR_SPEED + (self.difficulty_level * BAR_SPEED_STEP))
+
+    # Match clock
+    def now(self):
+        return self.clock() - self.paused_total
+
+    def match_time(self, stamp):
+        # Convert a clock() input timestamp to match time
+        return stamp - self.paused_total
+
+    def pause(self):
+        self.paused_at = self.clock()
+
+    def resume(self):
+        self.paused_total += self.clock() - self.paused_at
+        self.paused_at = None
+
+    # Player state that hits can change, saved and restored when a networked match rolls back.
+    # The bar and zone only depend on time, so they are never rolled back.
+    def snapshot(self):
+        return ([player.x for player in self.players], self.hit_counts[:], self.wrong_hits[:],
+                self.total_scores[:], self.winner, self.knocked_out[:])
+
+    def restore(self, snapshot):
+        xs, hit_counts, wrong_hits, total_scores, self.winner, knocked_out = snapshot
+        self.knocked_out = knocked_out[:]
+        for player, x in zip(self.players, xs):
+            player.x = x
+        self.hit_counts = hit_counts[:]
+        self.wrong_hits = wrong_hits[:]
+        self.total_scores = total_scores[:]
+
+    def phase_at(self, t):
+        for phase in reversed(self.phases):
+            if phase.start <= t:
+                return phase
+        return self.phases[0]
+
+    def hit(self, index, t):
+        # A player pressed their button at match time t: advance on a green-zone hit,
+        # lose after too many misses. Judged against the bar and zone at that exact instant.
+        if self.winner is not None or self.knocked_out[index]:
+            return  # The race is decided, nothing after the deciding hit counts
+        phase = self.phase_at(t)
+        zone = phase.zone
+        if zone[0] <= phase.position(t) <= zone[1]:
+            self.hit_counts[index] += 1
+            if self.hit_counts[index] >= MAX_HITS:
+                self.players[index].x += move_increment
+                self.hit_counts[index] = 0
+                self.total_scores[index] += 10
+                # Decided by this hit, before any later hit in the same batch of input
+                if self.players[index].x + CAR_WIDTH >= self.finish_line_x:
+                    self.winner = self.names[index]
+        else:
+            self.wrong_hits[index] += 1
+            if self.wrong_hits[index] >= WRONG_HITS_LIMIT:
+                # Knocked out; the last player still in wins
+                self.knocked_out[index] = True
+                remaining = [name for name, out in zip(self.names, self.knocked_out) if not out]
+                if len(remaining) == 1:
+                    self.winner = remaining[0]
+            self.players[index].speed = 0
+
+    def update(self, t):
+        # Move the success zone on schedule, starting a new bar phase at the exact move time
+        while t >= self.next_zone_time:
+            move_time = self.next_zone_time
+            previous = self.phases[-1]
+            speed = self.update_success_zone()
+            self.phases.append(BarPhase(move_time, previous.position(move_time), previous.direction(move_time), speed, self.success_zone))
+            self.next_zone_time += self.zone_move_delay
+
+        self.bar_position = self.phases[-1].position(t)
+
+        # Check win conditions
+        for player, name in zip(self.players, self.names):
+            if self.winner is None and player.x + CAR_WIDTH >= self.finish_line_x:
+                self.winner = name
 
     # Draw initial instructions
-    def draw_instructions():
-        instructions = [
-            "Player 1: Press SPACE in green zone",
-            "Player 2: Press A in green zone",
-            "Press R to pause",
-            "Green zone shrinks as you progress!"
-        ]
+    def draw_instructions(self):
         y = HEIGHT - 150
-        for instruction in instructions:
-            text = font.render(instruction, True, BLACK)
+        for text in self.assets["instructions"]:
             screen.blit(text, (WIDTH//2 - text.get_width()//2, y))
             y += 30
 
-    # Game loop
-    show_instructions = True
-    instruction_timer = pygame.time.get_ticks()
-    current_bar_speed = BAR_SPEED
-
-    while running:
-        screen.blit(background_image, (0, 0))
-        screen.blit(finish_line, (finish_line_x, 0))
-        
-        # Update success zone periodically
-        if pygame.time.get_ticks() - zone_move_timer > zone_move_delay:
-            zone_move_timer = pygame.time.get_ticks()
-            current_bar_speed = update_success_zone()
-            
-        # Draw the finish line
-        pygame.draw.line(screen, FINISH_LINE_COLOR, (finish_line_x, 0), (finish_line_x, HEIGHT), 5)
-
-        # Show instructions for first 5 seconds
-        if show_instructions and pygame.time.get_ticks() - instruction_timer < 5000:
-            draw_instructions()
+    def draw(self):
+        # Background and finish line come pre-composed
+        screen.blit(self.assets["backdrop"], (0, 0))
+
+        # Show instructions for first 5 seconds (compact lanes label each player instead)
+        if self.show_instructions and not self.compact and self.now() - self.start_time < 5:
+            self.draw_instructions()
         else:
-            show_instructions = False
+            self.show_instructions = False
+
+        # Draw cars and sliding bars
+        for player, bar_y in zip(self.players, self.bar_ys):
+            player.draw(screen)
+            draw_sliding_bar(self.bar_position, self.bar_track, 50, bar_y)
+
+        # Draw scores and hit counts
+        if self.compact:
+            for index, bar_y in enumerate(self.bar_ys):
+                status = "OUT" if self.knocked_out[index] else f"{self.total_scores[index]}  {self.hit_counts[index]}/{MAX_HITS}"
+                screen.blit(render_text(f"{self.labels[index]}: {status}"), (BAR_LENGTH + 60, bar_y - 5))
+        else:
+            score_text1 = render_text(f"P1 Score: {self.total_scores[0]} Hits: {self.hit_counts[0]}/{MAX_HITS}")
+            score_text2 = render_text(f"P2 Score: {self.total_scores[1]} Hits: {self.hit_counts[1]}/{MAX_HITS}")
+            screen.blit(score_text1, (10, 10))
+            screen.blit(score_text2, (10, 40))
+        level_text = render_text(f"Difficulty: {int(self.difficulty_level)}")
+        screen.blit(level_text, (WIDTH - 150, 10))
 
-        for event in pygame.event.get():
+# Classic controls: SPACE and A on the keyboard, or the same commands from the Arduino
+DEFAULT_KEYS = {pygame.K_SPACE: 0, pygame.K_a: 1}
+ARDUINO_COMMANDS = {"SPACE": 0, "A": 1}
+
+def game_loop(player_count=2, keys=DEFAULT_KEYS, labels=None):
+    # keys maps a key to the player it is bound to; devices bound to a player tag their events with it
+    match = Match(load_assets(), player_count)
+    if labels:
+        match.labels = labels
+    last_command_times = {}  # Per serial device, for the command cooldown
+    frame_time = 1 / FPS
+    next_frame = time.perf_counter()
+    events = []
+
+    # Game loop: a rematch resets the match in place instead of starting a nested game_loop()
+    while True:
+        # Zone moves up to now are applied first, so every hit below is judged against
+        # the bar and zone at its own timestamp
+        match.update(match.now())
+
+        for event, stamp in events:
             if event.type == pygame.QUIT:
-                running = False
+                return
 
             # Player controls
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if bar_position >= success_zone[0] and bar_position <= success_zone[1]:
-                        hit_count1 += 1
-                        if hit_count1 >= MAX_HITS:
-                            player1.x += move_increment
-                            hit_count1 = 0
-                            total_score1 += 10
-                    else:
-                        wrong_hits1 += 1
-                        if wrong_hits1 >= WRONG_HITS_LIMIT:
-                            choice = win_screen("Player 2")
-                            if choice == "play_again":
-                                return game_loop()
-                            elif choice == "main_menu":
-                                running = False
-                                return
-                        player1.speed = 0
-
-                elif event.key == pygame.K_a:
-                    if bar_position >= success_zone[0] and bar_position <= success_zone[1]:
-                        hit_count2 += 1
-                        if hit_count2 >= MAX_HITS:
-                            player2.x += move_increment
-                            hit_count2 = 0
-                            total_score2 += 10
-                    else:
-                        wrong_hits2 += 1
-                        if wrong_hits2 >= WRONG_HITS_LIMIT:
-                            choice = win_screen("Player 1")
-                            if choice == "play_again":
-                                return game_loop()
-                            elif choice == "main_menu":
-                                running = False
-                                return
-                        player2.speed = 0
-
+                player = keys.get(event.key)
+                if player is not None:
+                    match.hit(player, match.match_time(stamp))
                 elif event.key == pygame.K_r:
-                    a = pause_menu()
-                    if a == "stop":
+                    match.pause()
+                    if pause_menu() == "stop":
                         return
+                    match.resume()
+
+            # Handle Arduino and per-player device input
+            elif event.type == SERIAL_EVENT:
+                if (stamp - last_command_times.get(event.device, 0)) * 1000 > command_cooldown:
+                    last_command_times[event.device] = stamp
 
-        # Handle Arduino input
-        if arduino and arduino.in_waiting:
-            try:
-                command = arduino.readline().decode('utf-8').strip()
-                now = pygame.time.get_ticks()
-                
-                if now - last_command_time > command_cooldown:
-                    last_command_time = now
-                    
-                    if command == "SPACE":
-                        if bar_position >= success_zone[0] and bar_position <= success_zone[1]:
-                            hit_count1 += 1
-                            if hit_count1 >= MAX_HITS:
-                                player1.x += move_increment
-                                hit_count1 = 0
-                                total_score1 += 10
-                        else:
-                            wrong_hits1 += 1
-                            if wrong_hits1 >= WRONG_HITS_LIMIT:
-                                choice = win_screen("Player 2")
-                                if choice == "play_again":
-                                    return game_loop()
-                                elif choice == "main_menu":
-                                    running = False
-                                    return
-                            player1.speed = 0
-
-                    elif command == "A":
-                        if bar_position >= success_zone[0] and bar_position <= success_zone[1]:
-                            hit_count2 += 1
-                            if hit_count2 >= MAX_HITS:
-                                player2.x += move_increment
-                                hit_count2 = 0
-                                total_score2 += 10
-                        else:
-                            wrong_hits2 += 1
-                            if wrong_hits2 >= WRONG_HITS_LIMIT:
-                                choice = win_screen("Player 1")
-                                if choice == "play_again":
-                                    return game_loop()
-                                elif choice == "main_menu":
-                                    running = False
-                                    return
-                            player2.speed = 0
-
-                    elif command == "R":
-                        a = pause_menu()
-                        if a == "stop":
+                    if event.command == "R":
+                        match.pause()
+                        if pause_menu() == "stop":
                             return
-            except Exception as e:
-                pass
-
-        # Update bar movement with current speed
-        bar_position += current_bar_speed * bar_direction
-        if bar_position > 200 or bar_position < 0:
-            bar_direction *= -1
-
-        # Draw game elements
-        player1.draw(screen)
-        player2.draw(screen)
-        
-        # Draw sliding bars
-        draw_sliding_bar(bar_position, success_zone, 50, HEIGHT//3 - 50)
-        draw_sliding_bar(bar_position, success_zone, 50, 2*HEIGHT//3 - 50)
-        
-        # Draw scores and hit counts
-        score_text1 = font.render(f"P1 Score: {total_score1} Hits: {hit_count1}/{MAX_HITS}", True, BLACK)
-        score_text2 = font.render(f"P2 Score: {total_score2} Hits: {hit_count2}/{MAX_HITS}", True, BLACK)
-        level_text = font.render(f"Difficulty: {int(difficulty_level)}", True, BLACK)
-        screen.blit(score_text1, (10, 10))
-        screen.blit(score_text2, (10, 40))
-        screen.blit(level_text, (WIDTH - 150, 10))
+                        match.resume()
+                    else:
+                        # A player's own device counts any other line as a hit
+                        player = event.player if event.player is not None else ARDUINO_COMMANDS.get(event.command)
+                        if player is not None and player < player_count:
+                            match.hit(player, match.match_time(stamp))
 
-        # Check win conditions
-        if player1.x + CAR_WIDTH >= finish_line_x:
-            choice = win_screen("Player 1")
-            if choice == "play_again":
-                return game_loop()
-            elif choice == "main_menu":
-                running = False
-                return
+            if match.winner:
+                break  # Ignore further input once the race is decided
+
+        match.draw()
 
-        if player2.x + CAR_WIDTH >= finish_line_x:
-            choice = win_screen("Player 2")
+        if match.winner:
+            choice = win_screen(match.winner)
             if choice == "play_again":
-                return game_loop()
-            elif choice == "main_menu":
-                running = False
-                return
+                match.reset()
+                next_frame = time.perf_counter()
+                events = []
+                continue
+            return
 
         pygame.display.flip()
-        clock.tick(FPS)
 
-def win_screen(winner):
-    win = True
-    selection = 0  # 0 for Play Again, 1 for Main Menu
-    
-    while win:
-        screen.fill(WHITE)
-        
-        # Draw winner announcement
-        winner_text = font.render(f"{winner} WINS!", True, BLACK)
-        screen.blit(winner_text, (WIDTH//2 - winner_text.get_width()//2, HEIGHT//3))
-        
+        # Wait for the next frame, collecting timestamped input as it arrives
+        next_frame = max(next_frame + frame_time, time.perf_counter())
+        events = wait_for_frame(next_frame)
+
+def draw_menu(title, options, selection):
+    screen.fill(WHITE)
+
+    # Draw title
+    title_text = font.render(title, True, BLACK)
+    screen.blit(title_text, (WIDTH//2 - title_text.get_width()//2, HEIGHT//3))
+
+    for i, (label, rect, text_y) in enumerate(options):
         # Draw menu options with selection indicator
-        play_text = font.render("▶ Play Again" if selection == 0 else "  Play Again", True, BLACK)
-        menu_text = font.render("▶ Main Menu" if selection == 1 else "  Main Menu", True, BLACK)
-        
-        # Draw boxes around options
-        play_rect = pygame.Rect(WIDTH//2 - 100, HEIGHT//2, 200, 40)
-        menu_rect = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 + 50, 200, 40)
-        
-        # Highlight selected option
-        if selection == 0:
-            pygame.draw.rect(screen, GREEN, play_rect, 3)
-            pygame.draw.rect(screen, BLACK, menu_rect, 1)
+        text = font.render("▶ " + label if selection == i else "  " + label, True, BLACK)
+
+        # Draw boxes around options, highlighting the selected one
+        if selection == i:
+            pygame.draw.rect(screen, GREEN, rect, 3)
         else:
-            pygame.draw.rect(screen, BLACK, play_rect, 1)
-            pygame.draw.rect(screen, GREEN, menu_rect, 3)
-        
-        screen.blit(play_text, (WIDTH//2 - play_text.get_width()//2, HEIGHT//2 + 10))
-        screen.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, HEIGHT//2 + 60))
-        
-        # Draw controls help
-        controls_text = font.render("A: Change Selection    SPACE: Confirm", True, GRAY)
-        screen.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, HEIGHT - 50))
-        
-        for event in pygame.event.get():
+            pygame.draw.rect(screen, BLACK, rect, 1)
+
+        screen.blit(text, (WIDTH//2 - text.get_width()//2, text_y))
+
+    # Draw controls help
+    controls_text = font.render("A: Change Selection    SPACE: Confirm", True, GRAY)
+    screen.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, HEIGHT - 50))
+
+    pygame.display.flip()
+
+def run_menu(title, options, results, quit_result):
+    # Static menu: sleep until input, redraw only when the selection changes
+    selection = 0
+    redraw = True
+
+    while True:
+        if redraw:
+            draw_menu(title, options, selection)
+            redraw = False
+
+        for event in wait_for_events():
             if event.type == pygame.QUIT:
-                return "main_menu"
+                return quit_result
+            if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                redraw = True
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP or event.key == pygame.K_DOWN:
                     selection = 1 - selection
+                    redraw = True
                 if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                    if selection == 0:
-                        return "play_again"
-                    else:
-                        return "main_menu"
-                        
-        # Handle Arduino input
-        if arduino and arduino.in_waiting:
-            try:
-                command = arduino.readline().decode('utf-8').strip()
-                if command == "A":
+                    return results[selection]
+
+            # Handle Arduino input
+            if event.type == SERIAL_EVENT:
+                if event.command == "A":
                     selection = 1 - selection
-                elif command == "SPACE":
-                    if selection == 0:
-                        return "play_again"
-                    else:
-                        return "main_menu"
-            except:
-                pass
-                
-        pygame.display.flip()
+                    redraw = True
+                elif event.command == "SPACE":
+                    return results[selection]
+
+def win_screen(winner):
+    options = [
+        ("Play Again", pygame.Rect(WIDTH//2 - 100, HEIGHT//2, 200, 40), HEIGHT//2 + 10),
+        ("Main Menu", pygame.Rect(WIDTH//2 - 100, HEIGHT//2 + 50, 200, 40), HEIGHT//2 + 60),
+    ]
+    return run_menu(f"{winner} WINS!", options, ["play_again", "main_menu"], "main_menu")
 
 def pause_menu():
-    pause = True
-    selection = 0  # 0 for Resume, 1 for Main Menu
-    
-    while pause:
-        screen.fill(WHITE)
-        
-        # Draw title
-        title_text = font.render("GAME PAUSED", True, BLACK)
-        screen.blit(title_text, (WIDTH//2 - title_text.get_width()//2, HEIGHT//3))
-        
-        # Draw menu options with selection indicator
-        resume_text = font.render("▶ Resume" if selection == 0 else "  Resume", True, BLACK)
-        menu_text = font.render("▶ Main Menu" if selection == 1 else "  Main Menu", True, BLACK)
-        
-        # Draw boxes around options
-        resume_rect = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 - 50, 200, 40)
-        menu_rect = pygame.Rect(WIDTH//2 - 100, HEIGHT//2 + 50, 200, 40)
-        
-        # Highlight selected option
-        if selection == 0:
-            pygame.draw.rect(screen, GREEN, resume_rect, 3)
-            pygame.draw.rect(screen, BLACK, menu_rect, 1)
-        else:
-            pygame.draw.rect(screen, BLACK, resume_rect, 1)
-            pygame.draw.rect(screen, GREEN, menu_rect, 3)
-        
-        screen.blit(resume_text, (WIDTH//2 - resume_text.get_width()//2, HEIGHT//2 - 40))
-        screen.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, HEIGHT//2 + 60))
-        
-        # Draw controls help
-        controls_text = font.render("A: Change Selection    SPACE: Confirm", True, GRAY)
-        screen.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, HEIGHT - 50))
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return "stop"
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP or event.key == pygame.K_DOWN:
-                    selection = 1 - selection
-                if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                    if selection == 0:
-                        return None
-                    else:
-                        return "stop"
-                        
-        # Handle Arduino input
-        if arduino and arduino.in_waiting:
-            try:
-                command = arduino.readline().decode('utf-8').strip()
-                if command == "A":
-                    selection = 1 - selection
-                elif command == "SPACE":
-                    if selection == 0:
-                        return None
-                    else:
-                        return "stop"
-            except:
-                pass
-                
-        pygame.display.flip()
-        
-def draw_sliding_bar(position, success_zone, bar_x, bar_y):
+    options = [
+        ("Resume", pygame.Rect(WIDTH//2 - 100, HEIGHT//2 - 50, 200, 40), HEIGHT//2 - 40),
+        ("Main Menu", pygame.Rect(WIDTH//2 - 100, HEIGHT//2 + 50, 200, 40), HEIGHT//2 + 60),
+    ]
+    return run_menu("GAME PAUSED", options, [None, "stop"], "stop")
+
+def build_bar_track(label, success_zone):
+    # Pre-composite the label, red track and green success zone; rebuilt only when the zone moves
+    track = pygame.Surface((BAR_LENGTH, 50), pygame.SRCALPHA)
+
+    # Draw text above the bar
+    if label is not None:
+        track.blit(label, (20, 0))
+
     # Draw the track (red background)
-    pygame.draw.rect(screen, RED, (bar_x, bar_y, 200, 20))
-    
+    pygame.draw.rect(track, RED, (0, 30, BAR_LENGTH, 20))
+
     # Draw success zone (green)
     success_width = success_zone[1] - success_zone[0]
-    pygame.draw.rect(screen, GREEN, (bar_x + success_zone[0], bar_y, success_width, 20))
-    
+    pygame.draw.rect(track, GREEN, (success_zone[0], 30, success_width, 20))
+    return track
+
+def draw_sliding_bar(position, track, bar_x, bar_y):
+    screen.blit(track, (bar_x, bar_y - 30))
+
     # Draw moving indicator (black)
     pygame.draw.rect(screen, BLACK, (bar_x + position, bar_y - 5, 10, 30))
-    
-    # Draw text above the bar
-    text = font.render("Hit in Green Zone!", True, BLACK)
-    screen.blit(text, (bar_x + 20, bar_y - 30))
 
 
 def main():
     if __name__ == "__main__":
-        game_loop()
-        if arduino:
-            arduino.close()
+        parser = argparse.ArgumentParser(description="Retro Racing Arcade")
+        parser.add_argument("--player", action="append", dest="bindings", metavar="BINDING",
+                            help="add a player bound to a key name (space, a, l, ...) or a serial device path "
+                                 "(POSIX systems only); "
+                                 f"repeat for 2 to {MAX_PLAYERS} players")
+        args = parser.parse_args()
+
+        if args.bindings:
+            if not 2 <= len(args.bindings) <= MAX_PLAYERS:
+                parser.error(f"racing needs 2 to {MAX_PLAYERS} players")
+            keys = {}
+            labels = []
+            for player, binding in enumerate(args.bindings):
+                if os.sep in binding:
+                    try:
+                        devices.open(binding, player)
+                    except Exception as error:
+                        parser.error(f"can't open {binding}: {error}")
+                    labels.append(f"P{player + 1} [{os.path.basename(binding)}]")
+                else:
+                    try:
+                        keys[pygame.key.key_code(binding)] = player
+                    except ValueError:
+                        parser.error(f"unknown key {binding!r}")
+                    labels.append(f"P{player + 1} [{binding.upper()}]")
+            devices.start()
+            game_loop(len(args.bindings), keys, labels)
+        else:
+            devices.start()
+            game_loop()
+        devices.close()
         pygame.quit()
         print("Game ended")
 
@@ -0,0 +1,373 @@
+"""Head-to-head racing between two cabinets over UDP.
+
+Both cabinets run the same deterministic match: the bar and success zone only
+depend on a shared seed and the tick, so the only thing sent over the network
+is hit events. A local hit takes effect INPUT_DELAY ticks after it was pressed,
+which normally gives the other cabinet time to receive it. When a hit arrives
+later than that, the match rolls back to the tick before it and replays.
+Hits are still judged against the bar at the instant they were pressed.
+
+    python netplay.py --host --port 5005 --peer 127.0.0.1:5006
+    python netplay.py --port 5006 --peer 127.0.0.1:5005
+
+--latency, --jitter and --loss drop and delay outgoing packets to simulate a
+bad network. For an automated run of two local processes, add --bot SEED and
+--ticks N to both (with SDL_VIDEODRIVER=dummy); each prints a checksum of its
+confirmed state at tick N and the two must match.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+import pygame
+
+import main as racing
+
+TICK_RATE = racing.FPS
+TICK = 1 / TICK_RATE
+INPUT_DELAY = 3  # Ticks between a press and the tick it takes effect on
+MAX_ROLLBACK = 8  # Ticks we may run past the peer's inputs before stalling to wait for them
+MAX_CATCH_UP = 5  # Ticks simulated in one frame after a hitch
+POLL_INTERVAL = 0.001  # Input and network polling while waiting for the next tick
+HANDSHAKE_INTERVAL = 0.2
+LINGER = 2.0  # Seconds to keep sending after the race ends so the peer can confirm it too
+BOT_HIT_CHANCE = 0.1  # Per tick while the bar is in the green zone
+BOT_MISS_CHANCE = 0.002  # Per tick while it is not
+
+
+class NetworkShim:
+    # Stands in for the transport's sendto, dropping and delaying packets to simulate a bad link.
+    # Jitter can reorder packets, which the protocol has to cope with anyway.
+    def __init__(self, transport, latency=0, jitter=0, loss=0, rng=None):
+        self.transport = transport
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.loss = loss
+        self.rng = rng or random.Random()
+
+    def sendto(self, data, addr):
+        if self.rng.random() < self.loss:
+            return
+        delay = max(0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        if delay:
+            asyncio.get_running_loop().call_later(delay, self.transport.sendto, data, addr)
+        else:
+            self.transport.sendto(data, addr)
+
+
+class PeerProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.packets = []
+
+    def datagram_received(self, data, addr):
+        try:
+            self.packets.append(json.loads(data))
+        except ValueError:
+            pass  # Not one of ours
+
+    def take(self):
+        packets, self.packets = self.packets, []
+        return packets
+
+
+class NetStats:
+    def __init__(self):
+        self.rtt = None  # Smoothed round trip, seconds
+        self.jitter = 0  # Smoothed round trip variation, seconds
+        self.received = 0
+        self.first_seq = None
+        self.last_seq = -1
+        self.rollbacks = 0
+        self.rollback_ticks = 0
+        self.stalls = 0
+
+    def on_packet(self, seq):
+        self.received += 1
+        if self.first_seq is None:
+            self.first_seq = seq
+        self.last_seq = max(self.last_seq, seq)
+
+    def on_rtt(self, sample):
+        # Same smoothing as RFC 3550's interarrival jitter
+        if self.rtt is None:
+            self.rtt = sample
+        else:
+            self.jitter += (abs(sample - self.rtt) - self.jitter) / 16
+            self.rtt += (sample - self.rtt) / 8
+
+    def loss(self):
+        if self.first_seq is None:
+            return 0
+        expected = self.last_seq - self.first_seq + 1
+        return max(0, 1 - self.received / expected)
+
+    def lines(self):
+        rtt = f"{self.rtt * 1000:.0f} ms" if self.rtt is not None else "--"
+        return [
+            f"RTT {rtt}  jitter {self.jitter * 1000:.0f} ms",
+            f"Loss {self.loss() * 100:.0f}%  stalls {self.stalls}",
+            f"Rollbacks {self.rollbacks} ({self.rollback_ticks} ticks)",
+        ]
+
+
+class TickClock:
+    # Match clock for a networked match: time is the tick count, not the wall clock
+    def __init__(self):
+        self.tick = 0
+
+    def __call__(self):
+        return self.tick * TICK
+
+
+class Lockstep:
+    # Input delay plus rollback over a Match. Hits are (tick they take effect on, press time in
+    # thousandths of a tick); integers on the wire so both cabinets judge exactly the same time.
+    def __init__(self, match, clock, local, stats):
+        self.match = match
+        self.clock = clock
+        self.local = local
+        self.remote = 1 - local
+        self.stats = stats
+        self.tick = 0  # Next tick to simulate
+        self.hits = [{}, {}]  # Per player: tick -> press times
+        # Nobody can press before tick 0, so the peer's ticks before the delay are known to be empty
+        self.remote_through = INPUT_DELAY - 1
+        self.peer_ack = -1  # Last of our ticks the peer has every hit for
+        self.snapshots = {-1: match.snapshot()}  # State after each tick still inside the rollback window
+        self.last_tick_time = None  # perf_counter() when the previous tick was simulated
+        self.end_tick = None  # No ticks are simulated past this one
+
+    def local_through(self):
+        # Local hits are known for every tick up to here
+        return self.tick - 1 + INPUT_DELAY
+
+    def confirmed_tick(self):
+        return min(self.remote_through, self.tick - 1)
+
+    def confirmed(self):
+        return self.snapshots[self.confirmed_tick()]
+
+    def press(self, stamp):
+        # A local hit arrived at perf_counter() time stamp, somewhere between the previous tick
+        # and the one about to be simulated
+        fraction = 0
+        if self.last_tick_time is not None:
+            fraction = min(0.999, max(0, (stamp - self.last_tick_time) / TICK))
+        press_time = max(0, round((self.tick - 1 + fraction) * 1000))
+        self.hits[self.local].setdefault(self.tick + INPUT_DELAY, []).append(press_time)
+
+    def unacked_hits(self):
+        return [[tick, press_time] for tick, times in self.hits[self.local].items() if tick > self.peer_ack
+                for press_time in times]
+
+    def receive(self, through, hits, ack):
+        self.peer_ack = max(self.peer_ack, ack)
+        # The peer's hits for every tick up to through. Packets repeat everything the peer has not
+        # acknowledged, so anything at or below what we already have is a duplicate or reordered.
+        rollback_from = None
+        for tick, press_time in hits:
+            if self.remote_through < tick <= through:
+                self.hits[self.remote].setdefault(tick, []).append(press_time)
+                if tick < self.tick and (rollback_from is None or tick < rollback_from):
+                    rollback_from = tick
+        self.remote_through = max(self.remote_through, through)
+
+        if rollback_from is not None:
+            # We predicted the peer did nothing on ticks it actually hit on: replay from there
+            self.stats.rollbacks += 1
+            self.stats.rollback_ticks += self.tick - rollback_from
+            self.match.restore(self.snapshots[rollback_from - 1])
+            for tick in range(rollback_from, self.tick):
+                self.simulate(tick)
+            self.match.update(self.clock())
+
+        # Snapshots and hits before the confirmed tick can never be rolled back to again
+        confirmed = self.confirmed_tick()
+        for tick in [tick for tick in self.snapshots if tick < confirmed]:
+            del self.snapshots[tick]
+        for tick in [tick for tick in self.hits[self.remote] if tick <= confirmed]:
+            del self.hits[self.remote][tick]
+        # Our own hits are also kept until the peer has them, in case they need resending
+        local_done = min(confirmed, self.peer_ack)
+        for tick in [tick for tick in self.hits[self.local] if tick <= local_done]:
+            del self.hits[self.local][tick]
+
+    def can_advance(self):
+        if self.end_tick is not None and self.tick > self.end_tick:
+            return False
+        return self.tick - self.remote_through <= MAX_ROLLBACK
+
+    def advance(self):
+        self.simulate(self.tick)
+        self.tick += 1
+        self.clock.tick = self.tick
+        self.last_tick_time = time.perf_counter()
+
+    def simulate(self, tick):
+        self.match.update(tick * TICK)
+        # Same order on both cabinets: player 1's hits, then player 2's, each in press order
+        for player, hits in enumerate(self.hits):
+            for press_time in sorted(hits.get(tick, ())):
+                self.match.hit(player, press_time / 1000 * TICK)  # Ignored once there is a winner
+        self.snapshots[tick] = self.match.snapshot()
+
+
+def checksum(snapshot):
+    return hashlib.sha1(json.dumps(snapshot).encode()).hexdigest()[:12]
+
+
+def parse_address(text):
+    host, port = text.rsplit(":", 1)
+    return host, int(port)
+
+
+async def handshake(protocol, net, peer, host, seed):
+    # The host picks the seed and answers every hello with it; the guest says hello until it hears back
+    while True:
+        if not host:
+            net.sendto(json.dumps({"t": "hello"}).encode(), peer)
+        await asyncio.sleep(HANDSHAKE_INTERVAL)
+        for packet in protocol.take():
+            if packet.get("t") == "hello" and host:
+                net.sendto(json.dumps({"t": "start", "seed": seed}).encode(), peer)
+                return seed
+            if packet.get("t") == "start" and not host:
+                return packet["seed"]
+
+
+def draw_overlay(match, local, stats):
+    # Latency and rollback stats in the bottom left corner
+    lines = [f"You are {match.names[local]}"] + stats.lines()
+    y = racing.HEIGHT - 30 * len(lines) - 10
+    for text in lines:
+        racing.screen.blit(racing.render_text(text, racing.WHITE), (10, y))
+        y += 30
+
+
+async def run(args):
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(PeerProtocol, local_addr=("0.0.0.0", args.port))
+    net = NetworkShim(transport, args.latency, args.jitter, args.loss)
+    peer = parse_address(args.peer)
+    local = 0 if args.host else 1
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+
+    print("Waiting for the other cabinet...")
+    seed = await handshake(protocol, net, peer, args.host, seed)
+    print(f"Connected to {args.peer}, seed {seed}, you are Player {local + 1}")
+
+    stats = NetStats()
+    clock = TickClock()
+    match = racing.Match(racing.load_assets(), rng=random.Random(seed), clock=clock)
+    lockstep = Lockstep(match, clock, local, stats)
+    lockstep.end_tick = args.ticks
+    bot = random.Random(args.bot) if args.bot is not None else None
+
+    seq = 0
+    last_ping = None  # (peer's ping, perf_counter() when it arrived), echoed so the peer can time the round trip
+    finished_at = None
+    next_tick = time.perf_counter()
+    next_poll = next_tick
+
+    while True:
+        # Input: hits count for the local player whichever button the cabinet uses
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                transport.close()
+                return None
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_a):
+                lockstep.press(time.perf_counter())
+            elif event.type == racing.SERIAL_EVENT and event.command in ("SPACE", "A"):
+                lockstep.press(event.time)
+
+        # Network
+        for packet in protocol.take():
+            kind = packet.get("t")
+            if kind == "hello" and args.host:
+                net.sendto(json.dumps({"t": "start", "seed": seed}).encode(), peer)  # Our start was lost
+            elif kind == "in":
+                stats.on_packet(packet["seq"])
+                last_ping = (packet["ping"], time.perf_counter())
+                if packet["echo"] is not None:
+                    stats.on_rtt(time.perf_counter() - packet["echo"] - packet["hold"])
+                lockstep.receive(packet["through"], packet["hits"], packet["ack"])
+
+        # Simulation: fixed ticks, stalling when too far ahead of the peer
+        now = time.perf_counter()
+        steps = 0
+        while now >= next_tick and steps < MAX_CATCH_UP:
+            if not lockstep.can_advance():
+                if lockstep.end_tick is None:
+                    stats.stalls += 1
+                next_tick = now + TICK
+                break
+            if bot:
+                zone = match.success_zone
+                chance = BOT_HIT_CHANCE if zone[0] <= match.bar_position <= zone[1] else BOT_MISS_CHANCE
+                if bot.random() < chance:
+                    lockstep.press(now)
+            lockstep.advance()
+            next_tick += TICK
+            steps += 1
+        next_tick = max(next_tick, now - TICK)  # Don't try to catch up on a long hitch
+
+        # Send every poll that simulated something, and at least once per tick otherwise
+        if steps or now >= next_poll:
+            echo, hold = None, 0
+            if last_ping is not None:
+                echo, hold = last_ping[0], now - last_ping[1]
+            packet = {"t": "in", "seq": seq, "through": lockstep.local_through(), "ack": lockstep.remote_through,
+                      "hits": lockstep.unacked_hits(), "ping": now, "echo": echo, "hold": hold}
+            net.sendto(json.dumps(packet).encode(), peer)
+            seq += 1
+            next_poll = now + TICK
+
+        # The race ends on a tick both cabinets have confirmed, so they agree on the winner
+        confirmed_tick = lockstep.confirmed_tick()
+        confirmed = lockstep.confirmed()
+        if confirmed[4] is not None and (lockstep.end_tick is None or confirmed_tick < lockstep.end_tick):
+            lockstep.end_tick = confirmed_tick  # Nothing changes once there is a winner
+        if lockstep.end_tick is not None and confirmed_tick >= lockstep.end_tick:
+            if finished_at is None:
+                finished_at = now
+            if lockstep.peer_ack >= lockstep.local_through() or now - finished_at > LINGER:
+                transport.close()
+                return lockstep.end_tick, confirmed, stats
+
+        if steps:
+            match.draw()
+            draw_overlay(match, local, stats)
+            pygame.display.flip()
+
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race head to head against another cabinet over UDP")
+    parser.add_argument("--host", action="store_true", help="pick the seed and play as Player 1")
+    parser.add_argument("--port", type=int, default=5005, help="local UDP port")
+    parser.add_argument("--peer", required=True, help="other cabinet as host:port")
+    parser.add_argument("--seed", type=int, help="match seed (host only, random by default)")
+    parser.add_argument("--latency", type=float, default=0, help="simulated one-way latency, ms")
+    parser.add_argument("--jitter", type=float, default=0, help="simulated latency variation, +/- ms")
+    parser.add_argument("--loss", type=float, default=0, help="simulated packet loss, 0..1")
+    parser.add_argument("--bot", type=int, help="press automatically, seeded with this value")
+    parser.add_argument("--ticks", type=int, help="stop after this many confirmed ticks")
+    args = parser.parse_args()
+
+    racing.devices.start()
+    result = asyncio.run(run(args))
+    if result:
+        end_tick, confirmed, stats = result
+        winner = confirmed[4]
+        print(f"Confirmed tick {end_tick}: {winner + ' wins' if winner else 'no winner'}, state {checksum(confirmed)}")
+        print(" | ".join(stats.lines()))
+    racing.devices.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Headless soak / throughput harness for the space shooter.
+
+Runs the fixed-step simulation as fast as possible under the SDL dummy
+video driver, driven by a seeded bot instead of the keyboard or Arduino,
+and reports throughput, peak entity counts and memory use.
+
+    python soak.py --minutes 30 --seed 1 --bot random
+    python soak.py --minutes 5 --render-every 2 --tracemalloc
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Must be set before pygame creates the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import space_shooter as game_module
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+COMMANDS = ["UP", "DOWN", "LEFT", "RIGHT", "SPACE"]
+SCRIPT = ["SPACE", "UP", "SPACE", "UP", "SPACE", "DOWN", "SPACE", "DOWN", "SPACE", "DOWN", "SPACE", "DOWN", "SPACE", "UP", "SPACE", "UP"]
+
+
+def random_bot(rng):
+    while True:
+        yield rng.choice(COMMANDS)
+
+
+def scripted_bot():
+    while True:
+        yield from SCRIPT
+
+
+def apply_command(spaceship, command):
+    if command == "SPACE":
+        spaceship.shoot()
+    else:
+        spaceship.move(command)
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def memory_report():
+    parts = []
+    rss = max_rss_mb()
+    if rss is not None:
+        parts.append(f"max rss {rss:.1f} MB")
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        parts.append(f"traced {current / 1024:.0f} KB (peak {peak / 1024:.0f} KB)")
+    return ", ".join(parts) or "n/a"
+
+
+def run(minutes, seed, bot, render_every, command_interval):
+    random.seed(seed)  # The game draws spawns from the global random module
+    bot_rng = random.Random(seed)
+    commands = random_bot(bot_rng) if bot == "random" else scripted_bot()
+
+    game_module.init_display()
+    hud = game_module.HUD(pygame.font.SysFont(None, 36))
+    renderer = game_module.DirtyRenderer()
+    game = game_module.Game()
+
+    dt = game_module.SIM_DT
+    total_steps = int(minutes * 60 * game_module.SIM_HZ)
+    steps_per_minute = 60 * game_module.SIM_HZ
+    steps_per_command = max(1, round(command_interval * game_module.SIM_HZ))
+    peaks = {"enemies": 0, "asteroids": 0, "coins": 0, "projectiles": 0}
+    games_played = 1
+    frames = 0
+
+    start = time.perf_counter()
+    for step in range(1, total_steps + 1):
+        if step % steps_per_command == 0:
+            apply_command(game.spaceship, next(commands))
+
+        game.update(dt)
+
+        peaks["enemies"] = max(peaks["enemies"], len(game.enemies))
+        peaks["asteroids"] = max(peaks["asteroids"], len(game.asteroids))
+        peaks["coins"] = max(peaks["coins"], len(game.coins))
+        peaks["projectiles"] = max(peaks["projectiles"], len(game.spaceship.projectiles))
+
+        if game.health <= 0:  # Start a fresh game instead of showing the game over screen
+            game = game_module.Game()
+            games_played += 1
+
+        if render_every and step % render_every == 0:
+            renderer.clear()
+            rects = game.draw()
+            rects += hud.draw(game.score, game.health)
+            renderer.present(rects)
+            frames += 1
+
+        if step % steps_per_minute == 0:
+            print(f"[minute {step // steps_per_minute}] games {games_played}, "
+                  f"entities {len(game.enemies) + len(game.asteroids) + len(game.coins) + len(game.spaceship.projectiles)}, "
+                  f"{memory_report()}")
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {minutes} min ({total_steps} steps at {game_module.SIM_HZ} Hz) in {elapsed:.2f} s")
+    print(f"Steps per second: {total_steps / elapsed:.0f} ({total_steps * dt / elapsed:.1f}x real time)")
+    if render_every:
+        print(f"Rendered frames per second: {frames / elapsed:.0f}")
+    print(f"Games played: {games_played}")
+    print("Peak entities: " + ", ".join(f"{name} {count}" for name, count in peaks.items()))
+    print(f"Cached sprite variants: {len(game_module.sprite_cache)}")
+    print(f"Memory: {memory_report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless soak test for the space shooter")
+    parser.add_argument("--minutes", type=float, default=10, help="simulated minutes to run")
+    parser.add_argument("--seed", type=int, default=0, help="seed for spawns and the bot")
+    parser.add_argument("--bot", choices=["random", "scripted"], default="random")
+    parser.add_argument("--render-every", type=int, default=0,
+                        help="also draw a frame every N simulation steps (0 = simulation only)")
+    parser.add_argument("--command-interval", type=float, default=0.2,
+                        help="seconds between bot commands (the Arduino cooldown is 0.2)")
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python allocations (slower)")
+    args = parser.parse_args()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    run(args.minutes, args.seed, args.bot, args.render_every, args.command_interval)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,25 @@
+import os
 import pygame
 import random
 import sys
 
-# Initialize Pygame
-pygame.init()
 last_command_time = 0
 command_cooldown = 200
 
+# Asset paths are relative to this file so the game can be imported from anywhere
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Screen dimensions
 WIDTH, HEIGHT = 600, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Space Shooter")
+screen = None  # Created by init_display(), so importing the module doesn't open a window
+
+def init_display():
+    # Initialize Pygame and open the game window
+    global screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Space Shooter")
+    return screen
 
 # Colors
 BLACK = (0, 0, 0)
@@ -21,6 +30,39 @@ BLUE = (0, 0, 255)
 # Clock for controlling frame rate
 clock = pygame.time.Clock()
 
+# Timing: the simulation runs at a fixed rate, rendering runs as fast as FPS_CAP allows
+SIM_HZ = 120  # Fixed simulation steps per second
+SIM_DT = 1 / SIM_HZ  # Seconds per simulation step
+FPS_CAP = 60  # Render frame cap, 0 uncaps the renderer
+MAX_FRAME_TIME = 0.25  # Longest frame we catch up on, so a hitch can't cause a spiral of death
+LEGACY_FPS = 60  # Spawn rates and difficulty ramps are tuned as "per frame at 60 FPS"
+
+def lerp(start, end, alpha):
+    return start + (end - start) * alpha
+
+# Sprite cache: each (path, size) is loaded, scaled, converted and masked once, then shared by every spawn
+sprite_cache = {}
+
+def load_sprite(path, size):
+    key = (path, size)
+    if key not in sprite_cache:
+        image = pygame.image.load(os.path.join(BASE_DIR, path))
+        image = pygame.transform.scale(image, size).convert_alpha()
+        sprite_cache[key] = (image, pygame.mask.from_surface(image))
+    return sprite_cache[key]
+
+def collides(a, b):
+    # Cheap bounding box test first, then pixel-accurate mask overlap only for boxes that touch
+    if not (
+        a.x < b.x + b.width
+        and a.x + a.width > b.x
+        and a.y < b.y + b.height
+        and a.y + a.height > b.y
+    ):
+        return False
+    offset = (round(b.x) - round(a.x), round(b.y) - round(a.y))
+    return a.mask.overlap(b.mask, offset) is not None
+
 # Spaceship class
 class Spaceship:
     def __init__(self):
@@ -30,15 +72,15 @@ class Spaceship:
         self.y = 300
         self.speed = 5
         self.projectiles = []
-        self.shoot_cooldown = 0  # Cooldown timer for shooting
-        self.image = pygame.image.load("assets/ship.png")  # Load the ship image
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))  # Scale the image to fit
+        self.shoot_cooldown = 0  # Cooldown timer for shooting, in seconds
+        self.image, self.mask = load_sprite("assets/ship.png", (self.width, self.height))  # Load the ship image scaled to fit
 
-    def draw(self):
-        # Draw the ship image instead of the triangle
-        screen.blit(self.image, (self.x, self.y))
+    def draw(self, alpha=1):
+        # Draw the ship image instead of the triangle, returns every rect drawn
+        rects = [screen.blit(self.image, (self.x, self.y))]
         for projectile in self.projectiles:
-            projectile.draw()
+            rects.append(projectile.draw(alpha))
+        return rects
 
     def move(self, direction):
         if direction == "UP" and self.y > 0:
@@ -51,30 +93,35 @@ class Spaceship:
             self.x += 60  # Move in 10x10 grid
 
     def shoot(self):
-        if self.shoot_cooldown == 0:  # Only shoot if cooldown is 0
+        if self.shoot_cooldown <= 0:  # Only shoot if cooldown is over
             # Fire two beams with a smaller gap between them
             self.projectiles.append(Projectile(self.x + self.width, self.y + self.height // 2 - 10))  # Top beam
             self.projectiles.append(Projectile(self.x + self.width, self.y + self.height // 2 + 10))  # Bottom beam
-            self.shoot_cooldown = 15  # Cooldown remains the same
+            self.shoot_cooldown = 0.25  # Cooldown remains the same (15 frames at 60 FPS)
 
-    def update_cooldown(self):
+    def update_cooldown(self, dt):
         if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+            self.shoot_cooldown -= dt
 
 # Projectile class
+PROJECTILE_MASK = pygame.mask.Mask((10, 5), fill=True)  # Beams are solid rects
+
 class Projectile:
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        self.prev_x = x  # Position at the previous simulation step, for render interpolation
         self.width = 10
         self.height = 5
-        self.speed = 3  # Further reduced projectile speed
+        self.mask = PROJECTILE_MASK
+        self.speed = 180  # Further reduced projectile speed, in px/sec
 
-    def draw(self):
-        pygame.draw.rect(screen, WHITE, (self.x, self.y, self.width, self.height))
+    def draw(self, alpha=1):
+        return pygame.draw.rect(screen, WHITE, (lerp(self.prev_x, self.x, alpha), self.y, self.width, self.height))
 
-    def move(self):
-        self.x += self.speed
+    def move(self, dt):
+        self.prev_x = self.x
+        self.x += self.speed * dt
 
 # Enemy class
 class Enemy:
@@ -83,39 +130,43 @@ class Enemy:
         self.height = 70  # Increased height of the enemy sprite
         self.x = WIDTH
         self.y = 60 * round((random.randint(0, HEIGHT - self.height)) / 60)
-        self.speed = random.uniform(2, 4)  # Slightly vary enemy speed
-        self.image = pygame.image.load("assets/Alien Spaceship.png")  # Load enemy sprite
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))  # Scale the sprite
+        self.prev_x = self.x
+        self.speed = random.uniform(120, 240)  # Slightly vary enemy speed, in px/sec
+        self.image, self.mask = load_sprite("assets/Alien Spaceship.png", (self.width, self.height))  # Load enemy sprite
 
-    def draw(self):
-        screen.blit(self.image, (self.x, self.y))
+    def draw(self, alpha=1):
+        return screen.blit(self.image, (lerp(self.prev_x, self.x, alpha), self.y))
 
-    def move(self):
-        self.x -= self.speed
+    def move(self, dt):
+        self.prev_x = self.x
+        self.x -= self.speed * dt
 
 # Asteroid class
 class Asteroid:
     def __init__(self):
         self.size = random.randint(100, 200)  # Increased size for the sprite
+        self.width = self.height = self.size
         self.x = WIDTH
         self.y = 60 * round((random.randint(0, HEIGHT - self.size)) / 60)
-        self.speed = random.uniform(0.5, 2)  # Slower speed for asteroids
-        self.image = pygame.image.load("assets/Asteroid Brown.png")  # Load asteroid sprite
-        self.image = pygame.transform.scale(self.image, (self.size, self.size))  # Scale the sprite
+        self.prev_x = self.x
+        self.speed = random.uniform(30, 120)  # Slower speed for asteroids, in px/sec
+        self.image, self.mask = load_sprite("assets/Asteroid Brown.png", (self.size, self.size))  # Load asteroid sprite
         self.hit_count = 0  # Track the number of hits
         self.flash_timer = 0  # Timer for flashing effect
 
-    def draw(self):
+    def draw(self, alpha=1):
+        pos = (lerp(self.prev_x, self.x, alpha), self.y)
         if self.flash_timer > 0:  # Flash effect
             if int(self.flash_timer * 10) % 2 == 0:  # Alternate visibility
-                screen.blit(self.image, (self.x, self.y))
-        else:
-            screen.blit(self.image, (self.x, self.y))
+                return screen.blit(self.image, pos)
+            return None
+        return screen.blit(self.image, pos)
 
-    def move(self):
-        self.x -= self.speed
+    def move(self, dt):
+        self.prev_x = self.x
+        self.x -= self.speed * dt
         if self.flash_timer > 0:
-            self.flash_timer -= 1 / 60  # Decrease flash timer (assuming 60 FPS)
+            self.flash_timer -= dt  # Decrease flash timer
 
 # Coin class
 class Coin:
@@ -123,27 +174,98 @@ class Coin:
         self.size = 30  # Adjusted size for the sprite
         self.x = 60 * round((random.randint(WIDTH // 3, WIDTH - self.size)) / 60)  # Spawn on the right half of the grid
         self.y = 60 * round((random.randint(0, HEIGHT - self.size)) / 60)  # Align to grid
-        self.lifetime = 300  # Lifetime in frames (e.g., 5 seconds at 60 FPS)
-        self.image = pygame.image.load("assets/coin_spin-Sheet.png")  # Load coin sprite
-        self.image = pygame.transform.scale(self.image, (self.size, self.size))  # Scale the sprite
+        self.lifetime = 5  # Lifetime in seconds
+        self.image, self.mask = load_sprite("assets/coin_spin-Sheet.png", (self.size, self.size))  # Load coin sprite
 
-    def draw(self):
-        # Flash effect: alternate visibility in the last 60 frames
-        if self.lifetime > 60 or self.lifetime % 10 < 5:
-            screen.blit(self.image, (self.x, self.y))
+    def draw(self, alpha=1):
+        # Flash effect: alternate visibility every 5/60 s during the last second
+        if self.lifetime > 1 or int(self.lifetime * 60) % 10 < 5:
+            return screen.blit(self.image, (self.x, self.y))
+        return None
 
-    def update(self):
-        self.lifetime -= 1  # Decrease lifetime
+    def update(self, dt):
+        self.lifetime -= dt  # Decrease lifetime
 
-# Load health bar images
+# Health bar images, loaded when the HUD is created
 HEALTH_IMAGES = {
-    5: pygame.image.load("assets/Health Bar Five.png"),
-    4: pygame.image.load("assets/Health Bar Four.png"),
-    3: pygame.image.load("assets/Health Bar Three.png"),
-    2: pygame.image.load("assets/Health Bar Two.png"),
-    1: pygame.image.load("assets/Health Bar One.png"),
+    5: "assets/Health Bar Five.png",
+    4: "assets/Health Bar Four.png",
+    3: "assets/Health Bar Three.png",
+    2: "assets/Health Bar Two.png",
+    1: "assets/Health Bar One.png",
 }
 
+# HUD layout
+HEALTH_BAR_SIZE = (200, 40)  # Increased size to 200x40
+HEALTH_BAR_POS = (WIDTH // 2 - 100, HEIGHT - 50)  # Adjusted position for larger size
+
+# HUD class: composes the score text and health bar into one cached surface
+class HUD:
+    def __init__(self, font):
+        self.font = font
+        # Scale and convert every health bar variant once instead of every frame
+        self.health_images = {
+            health: load_sprite(path, HEALTH_BAR_SIZE)[0]
+            for health, path in HEALTH_IMAGES.items()
+        }
+        self.key = None  # (score, health) the surface was composed for
+        self.surface = None
+        self.blits = []  # (surface, screen position, area) for each part, drawn in one blits() call
+        self.rects = []  # Screen areas with something drawn on them
+
+    def compose(self, score, health):
+        # Called only when the score or health changes
+        score_image = self.font.render(f"Score: {score}", True, WHITE)
+        parts = [(score_image, (WIDTH // 2 - score_image.get_width() // 2, 10))]  # Score at the top middle
+        if health in self.health_images:
+            parts.append((self.health_images[health], HEALTH_BAR_POS))  # Health bar using heart assets
+        self.rects = [image.get_rect(topleft=pos) for image, pos in parts]
+        bounds = self.rects[0].unionall(self.rects[1:])
+        self.surface = pygame.Surface(bounds.size, pygame.SRCALPHA).convert_alpha()
+        for image, (x, y) in parts:
+            self.surface.blit(image, (x - bounds.x, y - bounds.y))
+        # Only the parts are copied to the screen: the transparent gap between them spans most
+        # of the screen height and would cost several times more to blend than the parts
+        self.blits = [(self.surface, rect, rect.move(-bounds.x, -bounds.y)) for rect in self.rects]
+        self.key = (score, health)
+
+    def draw(self, score, health):
+        if (score, health) != self.key:
+            self.compose(score, health)
+        screen.blits(self.blits, doreturn=False)
+        return self.rects
+
+# Dirty-rect renderer: on a black background only the areas under sprites change,
+# so clear and present just last frame's and this frame's sprite rects
+DIRTY_FLIP_THRESHOLD = 0.5  # Fraction of the screen above which a full flip is cheaper
+
+class DirtyRenderer:
+    def __init__(self):
+        self.prev_rects = []  # Rects drawn last frame, cleared before drawing the next one
+        self.full_redraw = True  # First frame (or after invalidate) clears and flips everything
+
+    def invalidate(self):
+        # Call after anything else drew over the whole screen
+        self.full_redraw = True
+
+    def clear(self):
+        if self.full_redraw:
+            screen.fill(BLACK)
+        else:
+            for rect in self.prev_rects:
+                screen.fill(BLACK, rect)
+
+    def present(self, rects):
+        rects = [rect for rect in rects if rect]
+        dirty = self.prev_rects + rects
+        dirty_area = sum(rect.width * rect.height for rect in dirty)
+        if self.full_redraw or dirty_area > WIDTH * HEIGHT * DIRTY_FLIP_THRESHOLD:
+            pygame.display.flip()  # Crowded screen: one full present beats many small ones
+        else:
+            pygame.display.update(dirty)
+        self.prev_rects = rects
+        self.full_redraw = False
+
 def game_over_screen(score):
     screen.fill(BLACK)
     font = pygame.font.SysFont(None, 72)
@@ -163,10 +285,126 @@ def game_over_screen(score):
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                main()  # Restart the game
+                return  # The caller starts a new game with the same settings
+
+def spawn_roll(rate, frames):
+    # A "one in rate" chance per 60 FPS frame, scaled to a step covering `frames` of those frames
+    return random.random() * rate < frames
+
+# Game class: all simulation state, advanced in fixed SIM_DT steps
+class Game:
+    def __init__(self):
+        self.spaceship = Spaceship()
+        self.enemies = []
+        self.asteroids = []  # List to store asteroids
+        self.coins = []  # List to store coins
+        self.score = 0
+        self.health = 5  # Player's health set to 5
+        self.enemy_spawn_rate = 120  # Slightly decreased spawn rate for enemies
+        self.asteroid_spawn_rate = 500  # Less frequent asteroid spawn rate
+        self.coin_spawn_rate = 500  # Coin spawn rate
+        self.enemy_speed_increment = 3  # Decrease the rate of enemy speed increment (px/sec per 60 FPS frame)
+        self.asteroid_spawn_rate_increment = 50  # Increment to make asteroids spawn less frequently over time
+        self.sim_time = 0  # Simulated seconds since the game started
+
+    def update(self, dt):
+        spaceship = self.spaceship
+        frames = dt * LEGACY_FPS  # How many 60 FPS frames this step stands in for
+        self.sim_time += dt
+        spaceship.update_cooldown(dt)  # Update the cooldown timer
+
+        # Update projectiles
+        for projectile in spaceship.projectiles[:]:
+            projectile.move(dt)
+            if projectile.x > WIDTH:
+                spaceship.projectiles.remove(projectile)
+
+        # Spawn enemies
+        if spawn_roll(self.enemy_spawn_rate, frames):
+            self.enemies.append(Enemy())
+
+        # Spawn asteroids only after 6 seconds of gameplay
+        if self.sim_time > 6:
+            if spawn_roll(self.asteroid_spawn_rate, frames):
+                self.asteroids.append(Asteroid())
+
+        # Spawn coins occasionally
+        if spawn_roll(self.coin_spawn_rate, frames):
+            self.coins.append(Coin())
+
+        # Gradually increase enemy speed and spawn rate
+        if self.score % 20 == 0 and self.score > 0:  # Every 20 points (slower rate)
+            for enemy in self.enemies:
+                enemy.speed += self.enemy_speed_increment * frames
+            if self.enemy_spawn_rate > 30:  # Limit how fast enemies spawn
+                self.enemy_spawn_rate -= frames
+            if self.asteroid_spawn_rate < 1000:  # Limit how infrequent asteroids spawn
+                self.asteroid_spawn_rate += self.asteroid_spawn_rate_increment * frames
+
+        # Update enemies
+        for enemy in self.enemies[:]:
+            enemy.move(dt)
+            if enemy.x < 0:
+                self.enemies.remove(enemy)  # Remove enemy if it reaches the left side
+                self.health -= 1  # Reduce health by 1
+            elif collides(spaceship, enemy):
+                self.enemies.remove(enemy)  # Remove enemy on collision (no damage to the player)
+            else:
+                for projectile in spaceship.projectiles[:]:
+                    if collides(projectile, enemy):
+                        spaceship.projectiles.remove(projectile)
+                        self.enemies.remove(enemy)
+                        self.score += 1
+                        break
+
+        # Update asteroids
+        for asteroid in self.asteroids[:]:
+            asteroid.move(dt)
+            if asteroid.x + asteroid.size < 0:
+                self.asteroids.remove(asteroid)  # Remove asteroid if it moves off-screen
+            else:
+                for projectile in spaceship.projectiles[:]:
+                    if collides(projectile, asteroid):
+                        spaceship.projectiles.remove(projectile)
+                        asteroid.hit_count += 1  # Increment hit count
+                        if asteroid.hit_count >= 10:
+                            asteroid.flash_timer = 0.2  # Start flashing for 0.2 seconds
+                            self.asteroids.remove(asteroid)  # Remove asteroid after flashing
+                            break
+                if asteroid.hit_count >= 10:
+                    continue  # Already destroyed by a projectile
+                if collides(spaceship, asteroid):
+                    asteroid.flash_timer = 0.2  # Start flashing for 0.2 seconds
+                    self.asteroids.remove(asteroid)  # Remove asteroid after flashing
+                    self.health -= 1  # Reduce health by 1
+
+        # Update coins
+        for coin in self.coins[:]:
+            coin.update(dt)
+            if coin.lifetime <= 0:  # Remove coin if its lifetime expires
+                self.coins.remove(coin)
+            elif (
+                spaceship.x < coin.x + coin.size
+                and spaceship.x + spaceship.width > coin.x
+                and spaceship.y < coin.y + coin.size
+                and spaceship.y + spaceship.height > coin.y
+            ):
+                self.coins.remove(coin)  # Collect the coin
+                self.score += 5  # Increase score when collecting a coin
+
+    def draw(self, alpha=1):
+        # alpha is how far the renderer sits between the last two simulation steps
+        rects = self.spaceship.draw(alpha)
+        for enemy in self.enemies:
+            rects.append(enemy.draw(alpha))
+        for asteroid in self.asteroids:
+            rects.append(asteroid.draw(alpha))
+        for coin in self.coins:
+            rects.append(coin.draw(alpha))
+        return rects
 
 # Main game loop
-def main():
+def main(fps_cap=FPS_CAP):
     global last_command_time  # Add this line to access the global variable
     import serial
     global arduino
@@ -175,24 +413,17 @@ def main():
     except Exception as e:
         print(f"[ERROR] Could not connect to Arduino: {e}")
         arduino = None
-    spaceship = Spaceship()
-    enemies = []
-    asteroids = []  # List to store asteroids
-    coins = []  # List to store coins
-    score = 0
-    health = 5  # Player's health set to 5
+    init_display()
+    game = Game()
+    spaceship = game.spaceship
     font = pygame.font.SysFont(None, 36)
-    enemy_spawn_rate = 120  # Slightly decreased spawn rate for enemies
-    asteroid_spawn_rate = 500  # Less frequent asteroid spawn rate
-    coin_spawn_rate = 500  # Coin spawn rate
-    enemy_speed_increment = 0.05  # Decrease the rate of enemy speed increment
-    asteroid_spawn_rate_increment = 50  # Increment to make asteroids spawn less frequently over time
-    game_start_time = pygame.time.get_ticks()  # Track the start time of the game
+    hud = HUD(font)
+    renderer = DirtyRenderer()
     time_of_last_keydown = -1000  # Timer for keydown events
+    accumulator = 0  # Real time not yet consumed by simulation steps
+    clock.tick()  # Don't count setup time as the first frame
 
     while True:
-        screen.fill(BLACK)
-
         # Event handling
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -211,7 +442,7 @@ def main():
                 elif event.key == pygame.K_SPACE:
                     spaceship.shoot()
                 time_of_last_keydown = 0  # Reset the timer after a key press
-        if arduino.in_waiting:
+        if arduino and arduino.in_waiting:
             command = arduino.readline().decode('utf-8').strip()
             now = pygame.time.get_ticks()
             if now - last_command_time > command_cooldown:
@@ -226,130 +457,32 @@ def main():
                     spaceship.move("RIGHT")
                 elif command == "SPACE":
                     spaceship.shoot()
-        spaceship.update_cooldown()  # Update the cooldown timer
-
-        # Update projectiles
-        for projectile in spaceship.projectiles[:]:
-            projectile.move()
-            if projectile.x > WIDTH:
-                spaceship.projectiles.remove(projectile)
-
-        # Spawn enemies
-        if random.randint(1, enemy_spawn_rate) == 1:
-            enemies.append(Enemy())
-
-        # Spawn asteroids only after 6 seconds of gameplay
-        if pygame.time.get_ticks() - game_start_time > 6000:  # 6 seconds in milliseconds
-            if random.randint(1, asteroid_spawn_rate) == 1:
-                asteroids.append(Asteroid())
-
-        # Spawn coins occasionally
-        if random.randint(1, coin_spawn_rate) == 1:
-            coins.append(Coin())
-
-        # Gradually increase enemy speed and spawn rate
-        if score % 20 == 0 and score > 0:  # Every 20 points (slower rate)
-            for enemy in enemies:
-                enemy.speed += enemy_speed_increment
-            if enemy_spawn_rate > 30:  # Limit how fast enemies spawn
-                enemy_spawn_rate -= 1
-            if asteroid_spawn_rate < 1000:  # Limit how infrequent asteroids spawn
-                asteroid_spawn_rate += asteroid_spawn_rate_increment
-
-        # Update enemies
-        for enemy in enemies[:]:
-            enemy.move()
-            if enemy.x < 0:
-                enemies.remove(enemy)  # Remove enemy if it reaches the left side
-                health -= 1  # Reduce health by 1
-                if health <= 0:
-                    game_over_screen(score)  # Show game over screen
-            elif (
-                spaceship.x < enemy.x + enemy.width
-                and spaceship.x + spaceship.width > enemy.x
-                and spaceship.y < enemy.y + enemy.height
-                and spaceship.y + spaceship.height > enemy.y
-            ):
-                enemies.remove(enemy)  # Remove enemy on collision (no damage to the player)
-            for projectile in spaceship.projectiles[:]:
-                if (
-                    projectile.x < enemy.x + enemy.width
-                    and projectile.x + projectile.width > enemy.x
-                    and projectile.y < enemy.y + enemy.height
-                    and projectile.y + projectile.height > enemy.y
-                ):
-                    spaceship.projectiles.remove(projectile)
-                    enemies.remove(enemy)
-                    score += 1
-                    break
-
-        # Update asteroids
-        for asteroid in asteroids[:]:
-            asteroid.move()
-            if asteroid.x + asteroid.size < 0:
-                asteroids.remove(asteroid)  # Remove asteroid if it moves off-screen
-            else:
-                for projectile in spaceship.projectiles[:]:
-                    if (
-                        projectile.x < asteroid.x + asteroid.size
-                        and projectile.x + projectile.width > asteroid.x
-                        and projectile.y < asteroid.y + asteroid.size
-                        and projectile.y + projectile.height > asteroid.y
-                    ):
-                        spaceship.projectiles.remove(projectile)
-                        asteroid.hit_count += 1  # Increment hit count
-                        if asteroid.hit_count >= 10:
-                            asteroid.flash_timer = 0.2  # Start flashing for 0.2 seconds
-                            asteroids.remove(asteroid)  # Remove asteroid after flashing
-                            break
-                if (
-                    spaceship.x < asteroid.x + asteroid.size
-                    and spaceship.x + spaceship.width > asteroid.x
-                    and spaceship.y < spaceship.y + asteroid.size
-                    and spaceship.y + spaceship.height > asteroid.y
-                    ):
-                    asteroid.flash_timer = 0.2  # Start flashing for 0.2 seconds
-                    asteroids.remove(asteroid)  # Remove asteroid after flashing
-                    health -= 1  # Reduce health by 1
-                    if health <= 0:
-                        game_over_screen(score)  # Show game over screen
-
-        # Update coins
-        for coin in coins[:]:
-            coin.update()
-            if coin.lifetime <= 0:  # Remove coin if its lifetime expires
-                coins.remove(coin)
-            elif (
-                spaceship.x < coin.x + coin.size
-                and spaceship.x + spaceship.width > coin.x
-                and spaceship.y < coin.y + coin.size
-                and spaceship.y + spaceship.height > coin.y
-            ):
-                coins.remove(coin)  # Collect the coin
-                score += 5  # Increase score when collecting a coin
-
-        # Draw everything
-        spaceship.draw()
-        for enemy in enemies:
-            enemy.draw()
-        for asteroid in asteroids:
-            asteroid.draw()
-        for coin in coins:
-            coin.draw()
-
-        # Display score at the top middle
-        score_text = font.render(f"Score: {score}", True, WHITE)
-        screen.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, 10))
-
-        # Draw health bar using heart assets
-        if health > 0:
-            health_image = pygame.transform.scale(HEALTH_IMAGES[health], (200, 40))  # Increased size to 200x40
-            screen.blit(health_image, (WIDTH // 2 - 100, HEIGHT - 50))  # Adjusted position for larger size
-        else:
-            game_over_screen(score)  # Show game over screen when health is 0
 
-        pygame.display.flip()
-        clock.tick(60)
+        # Run as many fixed steps as the real time since the last frame covers.
+        # Clamping the frame time drops the backlog after a hitch instead of spiralling.
+        accumulator += min(clock.get_time() / 1000, MAX_FRAME_TIME)
+        while accumulator >= SIM_DT:
+            game.update(SIM_DT)
+            accumulator -= SIM_DT
+            if game.health <= 0:
+                game_over_screen(game.score)  # Show game over screen
+                # Restart in this loop, so the frame cap and the Arduino connection carry over
+                game = Game()
+                spaceship = game.spaceship
+                renderer.invalidate()  # The game over screen covered everything
+                accumulator = 0
+                clock.tick()  # Don't count time on the game over screen
+                break
+
+        # Draw everything, interpolated between the last two simulation steps
+        renderer.clear()
+        rects = game.draw(accumulator / SIM_DT)
+
+        # Draw the score and health bar from the cached HUD surface
+        rects += hud.draw(game.score, game.health)
+
+        renderer.present(rects)
+        clock.tick(fps_cap)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(0 if "--uncapped" in sys.argv else FPS_CAP)